@@ -1,3 +1,4 @@
+import glob
 import importlib
 import logging
 import os
@@ -12,6 +13,7 @@ from qtpy.QtGui import QIcon, QPainterPath, QRegion
 from qtpy.QtWidgets import QApplication, QMainWindow, QWidget
 
 from . import plugins, __version__
+from .core.data_loader import expand_file_paths
 from .core.plugin import plugin
 from .utils import DATA_PATH
 from .widgets.workspace import Workspace
@@ -81,10 +83,19 @@ class Application(QApplication):
             self.current_workspace.model.add_data(spec2, "Spectrum 2")
             self.current_workspace.model.add_data(spec3, "Spectrum 3")
 
-        # If a file path has been given, automatically add data
-        if file_path is not None:
-            self.current_workspace.load_data(
-                file_path, file_loader, display=True)
+        # If file paths have been given, automatically add data. Several
+        # files, directories or glob patterns are loaded in parallel as a
+        # single batch.
+        if file_path:
+            file_paths = expand_file_paths(
+                [file_path] if isinstance(file_path, str) else file_path)
+
+            if len(file_paths) == 1:
+                self.current_workspace.load_data(
+                    file_paths[0], file_loader, display=True)
+            elif len(file_paths) > 1:
+                self.current_workspace.load_data_async(
+                    file_paths, file_loader, batch=True)
 
     def add_workspace(self):
         """
@@ -169,9 +180,24 @@ class SplashDialog(QDialog):
             self.close()
 
 
+def _check_file_paths(context, param, value):
+    """
+    Rejects the file paths given on the command line that do not exist.
+    Glob patterns are expanded when loading, so they are accepted as is.
+    """
+    missing = [x for x in value
+               if not glob.has_magic(x) and not os.path.exists(x)]
+
+    if len(missing) > 0:
+        raise click.BadParameter(
+            "Path(s) {} do not exist.".format(", ".join(missing)))
+
+    return value
+
+
 @click.command()
 @click.option('--hide_splash', '-H', is_flag=True, help="Hide the startup splash screen.")
-@click.option('--file_path', '-F', type=click.Path(exists=True), help="Load the file at the given path on startup.")
+@click.option('--file_path', '-F', type=str, multiple=True, callback=_check_file_paths, help="Load the file at the given path on startup. May be given several times, and accepts directories and glob patterns.")
 @click.option('--loader', '-L', type=str, help="Use specified loader when opening the provided file.")
 @click.option('--embed', '-E', is_flag=True, help="Only display a single plot window. Useful when embedding in other applications.")
 @click.option('--dev', '-D', is_flag=True, help="Open SpecViz in developer mode. This mode auto-loads example spectral data.")
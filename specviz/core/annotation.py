@@ -1,145 +1,245 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from pyqtgraph import functions, TextItem
+from collections import OrderedDict
 
-from qtpy.QtCore import QPointF
-from qtpy.QtGui import QPolygonF, QPen, QColor
+import numpy as np
 
-orientations = {
-    'horizontal': {'anchor': (0.5, 1), 'angle': 0},
-    'vertical': {'anchor': (0, 0.5), 'angle': 90}
-}
+from pyqtgraph import functions, GraphicsObject
 
+from qtpy.QtCore import QLineF, QPointF, QRectF, Qt
+from qtpy.QtGui import (QPen, QColor, QFont, QFontMetrics, QPainter, QPixmap,
+                        QTransform)
 
-class LineIDMarkerProxy(object):
-    ''' A proxy class that is used in lieu of a real, full-blown Line1DMarker.
+# Length of the line ID tick marks, in screen pixels.
+TICK_LENGTH = 20
 
-        The LineIDMarker constructor calls pyqtgraph's TextItem constructor. Profiling
-        analysis showed that it's an expensive operation to perform. However, it has
-        to be called many times during the course of a zoom operation. This proxy,
-        by avoiding to call the Line1DMarker base class' constructor, speeds up
-        the entire process.
+# Maximum number of label pixmaps kept by a LineIDMarkerLayer.
+LABEL_CACHE_SIZE = 4096
 
-        The idea is that this proxy is used to perform all the de-cluttering and
-        explicit clipping operations that take place before an actual marker can
-        be added to the plot. By postponing the instantiation of full-blown Line1DMarker
-        objects for the very end, only the ones actually showing up on screen are
-        instantiated. This saves an enormous amount of time not only on the constructor
-        phase, but also on the addItem and removeItem calls, which seem to generate in
-        turn an inordinate amount of calls to connect() and disconnect().
+
+class LineIDMarkerLayer(GraphicsObject):
+    ''' A single graphics item that draws a whole set of line ID markers.
+
+        Adding one text item per line to the plot makes the scene
+        graph overhead (painting, bounding rect and mouse handling) grow
+        with the number of lines. This layer instead draws all the tick
+        marks of each color with one drawLines call, and draws the labels
+        from a cache of pre-rendered pixmaps.
+
+        Marker positions are given in data coordinates. The tick marks and
+        labels are drawn at a fixed size in screen pixels, so markers do
+        not need to be rebuilt when the plot is zoomed.
+
+        Tooltips are found by looking up the marker under the mouse pointer
+        in the sorted marker positions, and are built on demand by the
+        `tooltip_provider`, a callable that takes the row of a marker (as
+        given to `set_markers`) and returns its tooltip text.
     '''
 
-    def __init__(self, x0, y0, proxy=None, text=None, plot_item=None, tip="", color=(0, 0, 0),
-                 orientation='horizontal'):
+    def __init__(self, orientation='vertical', tooltip_provider=None):
+        super(LineIDMarkerLayer, self).__init__()
 
-        self.x0 = x0
-        self.y0 = y0
+        self._orientation = orientation
+        self.tooltip_provider = tooltip_provider
 
-        if proxy:
-            # complete initialization by taking
-            # parameters from another instance.
-            self._text = proxy._text
-            self._plot_item = proxy._plot_item
-            self._tooltip = proxy._tooltip
-            self._color = proxy._color
-            self._orientation = proxy._orientation
+        self._font = QFont()
+        self._metrics = QFontMetrics(self._font)
 
-        else:
-            # initialize from passed values.
-            self._text = text
-            self._plot_item = plot_item
-            self._tooltip = tip
-            self._color = color
-            self._orientation = orientation
+        # least recently used label pixmaps are dropped first.
+        self._pixmaps = OrderedDict()
 
-    def __str__(self):
-        return str(self._text)
+        self.clear()
 
+        self.setAcceptHoverEvents(True)
 
-class LineIDMarker(TextItem):
-    ''' This class handles the drawing of a modified TextItem that's
-        augmented with a linear vertical marker. These items are used
-        to generate spectral line ID markers on the plot surface.
+    def __len__(self):
+        return len(self._x)
 
-        Note the convoluted handling of the 'color' parameter. This is
-        due to a bug in pyqtgraph's function 'functions.mkColor', which
-        bombs when presented with an argument of type Qt.GlobalColor.
+    def clear(self):
+        ''' Removes all markers. '''
+        self.set_markers([], [], [], [])
 
-        Line1DMarker instances can only be built from instances of the
-        matching Line1DMarkerProxy class, or from instances of itself.
-    '''
+    def set_markers(self, x, y, texts, colors, rows=None):
+        ''' Sets the markers to draw.
 
-    def __init__(self, marker=None):
+            Parameters
+            ----------
+            x, y: array
+                Positions of the markers, in data coordinates.
+            texts: list of str
+                The marker labels.
+            colors: list
+                The marker colors, in any format accepted by
+                `pyqtgraph.functions.mkColor`.
+            rows: array, optional
+                Identifiers passed to the tooltip provider, one per
+                marker. Default to the marker indices.
+        '''
+        self._x = np.asarray(x, dtype=float)
+        self._y = np.asarray(y, dtype=float)
+        self._texts = [str(text) for text in texts]
+        self._rows = np.arange(len(self._x)) if rows is None else np.asarray(rows)
+
+        # markers are grouped by color, so that the tick marks
+        # of each group are drawn with a single pen.
+        self._pens = {}
+        keys = []
+        for color in colors:
+            qcolor = functions.mkColor(color) if color is not None else QColor(Qt.black)
+            key = qcolor.rgba()
+            if key not in self._pens:
+                self._pens[key] = QPen(qcolor)
+            keys.append(key)
+        self._color_keys = keys
+        self._groups = [(key, np.flatnonzero(np.asarray(keys) == key))
+                        for key in self._pens]
+
+        self._sort_order = np.argsort(self._x, kind='mergesort')
+        self._sorted_x = self._x[self._sort_order]
+
+        # half the widest marker on screen, in pixels.
+        self._half_width = self._metrics.height() / 2.
+        if self._orientation != 'vertical' and len(self._texts) > 0:
+            self._half_width = max(self._metrics.boundingRect(text).width()
+                                   for text in set(self._texts)) / 2. + 1
+
+        self.setToolTip('')
+        self.update()
+
+    def set_positions(self, x, y=None):
+        ''' Moves the current markers, keeping their labels and colors.
+
+            Parameters
+            ----------
+            x, y: array
+                The new positions of the markers, in data coordinates.
+                The markers keep their current Y positions when `y`
+                is not given.
+        '''
+        self._x = np.asarray(x, dtype=float)
+        if y is not None:
+            self._y = np.asarray(y, dtype=float)
 
-        self.x0 = marker.x0
-        self.y0 = marker.y0
+        self._sort_order = np.argsort(self._x, kind='mergesort')
+        self._sorted_x = self._x[self._sort_order]
 
-        self._text = marker._text
-        self._plot_item = marker._plot_item
-        self._orientation = marker._orientation
-        self._color = marker._color
+        self.update()
 
-        self._anchor = orientations[self._orientation]['anchor']
-        self._angle = orientations[self._orientation]['angle']
+    def dataBounds(self, axis, frac=1.0, orthoRange=None):
+        # markers must not take part in auto ranging the plot.
+        return None
 
-        super(LineIDMarker, self).__init__(text=self._text, color=self._color,
-                                           anchor=self._anchor, angle=self._angle)
+    def boundingRect(self):
+        rect = self.viewRect()
+        return QRectF() if rect is None else rect
 
-        self._tooltip = marker._tooltip
-        self.setToolTip(marker._tooltip)
+    def viewTransformChanged(self):
+        self.prepareGeometryChange()
+        super(LineIDMarkerLayer, self).viewTransformChanged()
 
-        self.setFlag(self.ItemIsMovable)
+    def _label_pixmap(self, index):
+        key = (self._texts[index], self._color_keys[index])
 
-    # Repositioning the line labels on the fly, as the data is  zoomed in and out,
-    # does not work. The behavior that is described in the PyQt documentation is not
-    # observed. It appears that the setFlags(ItemSendsGeometryChanges) does not work.
-    # I am using pyqt version 4.8, so support for this flag should be there. The
-    # ItemIgnoresTransformations flag doesn't work either. When set, it messes up with
-    # the entire plot. This could be due to interference with pyqtgraph, or a threading
-    # issue. We give up on this approach and let the caller handle the zoom requests and
-    # the repainting.
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            text = self._texts[index]
+            rect = self._metrics.boundingRect(text)
+            pixmap = QPixmap(max(rect.width(), 1) + 2, self._metrics.height())
+            pixmap.fill(Qt.transparent)
 
-    def __str__(self):
-        return str(self._text)
+            painter = QPainter(pixmap)
+            painter.setFont(self._font)
+            painter.setPen(self._pens[self._color_keys[index]])
+            painter.drawText(pixmap.rect(), Qt.AlignLeft | Qt.AlignVCenter, text)
+            painter.end()
 
-    def paint(self, p, *args):
-        ''' Overrides the default implementation so as
-            to draw a vertical marker.
-        '''
-        # draw the text
-        #
-        # Note that this actually doesn't work. Commenting out this call to the base
-        # class doesn't prevent the text to be painted on screen regardless. Tests with
-        # the base class itself prove that the base class paint() is not responsible for
-        # painting the text. Even when the base class' code in its paint() method is
-        # replaced by a sole 'pass' statement, the text still shows up on the plot.
-        # Thus there is something else in either pyqtgraph or pyqt that paints the text
-        # even though the entire painting mechanism in the classes is disabled.
-        super(LineIDMarker, self).paint(p, args)
-
-        # Add marker. Geometry depends on the
-        # text being vertical or horizontal.
-        points = []
-        bounding_rect = self.boundingRect()
-
-        if self._orientation == 'vertical':
-            x = bounding_rect.x()
-            y = bounding_rect.y() + bounding_rect.height() / 2.
-
-            points.append(QPointF(x, y))
-            points.append(QPointF(x - 20, y))
+            if self._orientation == 'vertical':
+                pixmap = pixmap.transformed(QTransform().rotate(-90))
+
+            self._pixmaps[key] = pixmap
+            if len(self._pixmaps) > LABEL_CACHE_SIZE:
+                self._pixmaps.popitem(last=False)
         else:
-            x = bounding_rect.x() + bounding_rect.width() / 2.
-            y = bounding_rect.y() + bounding_rect.height() * 2.
+            self._pixmaps.move_to_end(key)
+
+        return pixmap
+
+    def _device_positions(self, transform, indices=slice(None)):
+        x = self._x[indices]
+        y = self._y[indices]
 
-            points.append(QPointF(x, y))
-            points.append(QPointF(x, y - 20))
+        px = transform.m11() * x + transform.m21() * y + transform.dx()
+        py = transform.m12() * x + transform.m22() * y + transform.dy()
 
-        polygon = QPolygonF(points)
+        return px, py
+
+    def paint(self, p, *args):
+        if len(self._x) == 0:
+            return
 
-        pen = QPen(QColor(functions.mkColor(self._color)))
-        p.setPen(pen)
-        p.drawPolygon(polygon)
+        # draw in device pixels, so that markers keep
+        # their size regardless of the zoom level.
+        px, py = self._device_positions(p.transform())
 
+        p.save()
+        p.resetTransform()
 
+        for key, indices in self._groups:
+            p.setPen(self._pens[key])
+            p.drawLines([QLineF(px[i], py[i], px[i], py[i] + TICK_LENGTH)
+                         for i in indices])
+
+        # labels sit on top of the tick marks.
+        for i in range(len(self._x)):
+            pixmap = self._label_pixmap(i)
+            p.drawPixmap(QPointF(px[i] - pixmap.width() / 2.,
+                                 py[i] - pixmap.height()), pixmap)
+
+        p.restore()
+
+    def marker_at(self, pos):
+        ''' Returns the row of the marker drawn at `pos`, a point in data
+            coordinates, or `None` if there is no marker there.
+        '''
+        # size of a screen pixel in data coordinates.
+        pixel_width = abs(self.pixelWidth() or 0.)
+        pixel_height = abs(self.pixelHeight() or 0.)
+
+        if len(self._x) == 0 or pixel_width == 0. or pixel_height == 0.:
+            return None
+
+        # only the markers closer in X than the widest
+        # marker need to be examined.
+        tolerance = self._half_width * pixel_width
+
+        first = np.searchsorted(self._sorted_x, pos.x() - tolerance, side='left')
+        last = np.searchsorted(self._sorted_x, pos.x() + tolerance, side='right')
+
+        # distances from the markers, in pixels, with Y pointing
+        # up the screen as the labels do. The closest marker in X
+        # wins when labels overlap.
+        result = None
+        closest = None
+        for i in self._sort_order[first:last]:
+            dx = abs(pos.x() - self._x[i]) / pixel_width
+            dy = (pos.y() - self._y[i]) / pixel_height
+
+            pixmap = self._label_pixmap(i)
+            if dx <= pixmap.width() / 2. and \
+                    -TICK_LENGTH <= dy <= pixmap.height() and \
+                    (closest is None or dx < closest):
+                result = self._rows[i]
+                closest = dx
+
+        return result
+
+    def hoverEvent(self, event):
+        tooltip = ''
+
+        if not event.isExit() and self.tooltip_provider is not None:
+            row = self.marker_at(event.pos())
+            if row is not None:
+                tooltip = self.tooltip_provider(row)
+
+        self.setToolTip(tooltip)
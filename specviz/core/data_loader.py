@@ -0,0 +1,245 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from qtpy.QtCore import QObject, Qt, Signal
+from specutils import Spectrum1D
+
+__all__ = ['DataLoader', 'expand_file_paths', 'read_spectrum']
+
+
+def expand_file_paths(paths):
+    """
+    Expands directories and glob patterns into the list of files they
+    designate.
+
+    Files are not opened here, so that expanding large directories does not
+    block the user interface. Files whose format no reader recognises are
+    reported by the `DataLoader` reading them.
+
+    Parameters
+    ----------
+    paths : list of str
+        File paths, directory paths or glob patterns.
+
+    Returns
+    -------
+    : list of str
+        The paths of the designated files, sorted within each directory or
+        pattern.
+    """
+    file_paths = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            found = sorted(x for x in (os.path.join(path, y)
+                                       for y in os.listdir(path))
+                           if os.path.isfile(x))
+        elif glob.has_magic(path):
+            found = sorted(x for x in glob.glob(path) if os.path.isfile(x))
+        else:
+            file_paths.append(path)
+            continue
+
+        file_paths.extend(found)
+
+    return file_paths
+
+
+def read_spectrum(file_path, file_loader=None):
+    """
+    Reads a single spectral data file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    file_loader : str, optional
+        Format specified for the astropy io interface. When not given, the
+        format is identified by the io registry, in the worker reading the
+        file, and files no reader recognises fail to load.
+
+    Returns
+    -------
+    : :class:`~specutils.Spectrum1D`
+        The spectrum read from the file.
+    """
+    return Spectrum1D.read(file_path, format=file_loader)
+
+
+class DataLoader(QObject):
+    """
+    Reads spectral data files in a pool of background threads so that the
+    user interface remains responsive while files are parsed.
+
+    Files are either delivered one at a time, or as batches delivered all at
+    once so that they can be added to a model in a single operation.
+
+    Threads are used rather than processes: the readers registered by
+    plugins and user code are available to them, and memory mapped arrays
+    are not copied to be sent back to the user interface.
+
+    Results are delivered through Qt signals, which are always received on
+    the thread the loader lives in (normally the GUI thread), so receivers
+    can safely add the loaded data to a model.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        The maximum number of worker threads. Defaults to the thread pool
+        default, which scales with the number of cores.
+
+    Signals
+    -------
+    loaded : Signal
+        Fired with the :class:`~specutils.Spectrum1D` and the file path when
+        a file loaded outside of a batch has been read.
+    batch_loaded : Signal
+        Fired with the list of spectra and the list of their file paths, in
+        the order they were requested, once every file of a batch has been
+        processed.
+    failed : Signal
+        Fired with the file path and an error message when a file could not
+        be read.
+    progress : Signal
+        Fired with the number of completed and total files every time a file
+        has been processed.
+    finished : Signal
+        Fired when every queued file has been processed, or when loading has
+        been cancelled.
+    """
+    loaded = Signal(object, str)
+    batch_loaded = Signal(list, list)
+    failed = Signal(str, str)
+    progress = Signal(int, int)
+    finished = Signal()
+
+    # Emitted from the worker threads, delivered on the loader's thread.
+    _future_done = Signal(object)
+
+    def __init__(self, max_workers=None, *args, **kwargs):
+        super(DataLoader, self).__init__(*args, **kwargs)
+
+        self._max_workers = max_workers
+        self._thread_pool = None
+
+        # Maps pending futures to their file path and, for batch loads, the
+        # position of the file within the batch
+        self._futures = {}
+        self._batch_results = {}
+        self._batch_size = 0
+        self._total = 0
+        self._completed = 0
+        self._is_shut_down = False
+
+        # Always queued, so that files read before `load` returns are not
+        # handled before the rest of their batch has been queued.
+        self._future_done.connect(self._on_future_done, Qt.QueuedConnection)
+
+    @property
+    def is_loading(self):
+        """Whether there are files still being read."""
+        return len(self._futures) > 0
+
+    def load(self, file_paths, file_loader=None, batch=False):
+        """
+        Queues files to be read in the background.
+
+        Parameters
+        ----------
+        file_paths : list of str
+            Paths to the spectrum files.
+        file_loader : str, optional
+            Format specified for the astropy io interface.
+        batch : bool
+            Deliver the files together through `batch_loaded` once they have
+            all been read, instead of one at a time through `loaded`.
+        """
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self._max_workers)
+
+        self._is_shut_down = False
+
+        for file_path in file_paths:
+            future = self._thread_pool.submit(read_spectrum, file_path,
+                                              file_loader)
+
+            if batch:
+                self._futures[future] = (file_path, self._batch_size)
+                self._batch_size += 1
+            else:
+                self._futures[future] = (file_path, None)
+
+            self._total += 1
+
+            future.add_done_callback(self._notify_done)
+
+        self.progress.emit(self._completed, self._total)
+
+    def cancel(self):
+        """
+        Cancels all queued files. Files that have not started loading are
+        dropped, and the results of files currently being read are discarded.
+        """
+        # Cancelling a future runs its done callback right away, which must
+        # not find it among the pending ones anymore.
+        futures, self._futures = self._futures, {}
+
+        for future in futures:
+            future.cancel()
+
+        self._reset()
+
+    def shutdown(self):
+        """
+        Cancels any pending work and releases the worker threads. Files
+        still being read when the loader is shut down are not reported.
+        """
+        self._is_shut_down = True
+        self.cancel()
+
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False)
+
+        self._thread_pool = None
+
+    def _reset(self):
+        self._batch_results = {}
+        self._batch_size = 0
+        self._total = 0
+        self._completed = 0
+        self.finished.emit()
+
+    def _notify_done(self, future):
+        # Called from the worker threads. Once shut down, the loader may
+        # already have been deleted by Qt, so it must not emit anything.
+        if not self._is_shut_down:
+            self._future_done.emit(future)
+
+    def _on_future_done(self, future):
+        file_path, batch_position = self._futures.pop(future, (None, None))
+
+        # The file has been cancelled
+        if file_path is None or future.cancelled():
+            return
+
+        exception = future.exception()
+
+        if exception is not None:
+            self.failed.emit(file_path, "{}\n{}".format(type(exception),
+                                                        exception))
+        elif batch_position is not None:
+            self._batch_results[batch_position] = (future.result(), file_path)
+        else:
+            self.loaded.emit(future.result(), file_path)
+
+        self._completed += 1
+        self.progress.emit(self._completed, self._total)
+
+        if not self.is_loading:
+            if len(self._batch_results) > 0:
+                specs, file_paths = zip(*(self._batch_results[x] for x in
+                                          sorted(self._batch_results)))
+                self.batch_loaded.emit(list(specs), list(file_paths))
+
+            self._reset()
@@ -10,6 +10,14 @@ from qtpy.QtGui import QStandardItem
 flatui = cycle(["#000000", "#9b59b6", "#3498db", "#95a5a6", "#e74c3c",
                 "#34495e", "#2ecc71"])
 
+# Spectra with at least this many samples are drawn through a
+# `LevelOfDetail` pyramid instead of handing the full arrays to pyqtgraph.
+LOD_SAMPLE_THRESHOLD = 100000
+
+# Pixel width assumed when decimating data for an item that has not been
+# added to a view yet.
+LOD_DEFAULT_WIDTH = 4096
+
 
 class DataItem(QStandardItem):
     NameRole = Qt.UserRole + 1
@@ -20,6 +28,10 @@ class DataItem(QStandardItem):
                  *args, **kwargs):
         super(DataItem, self).__init__(*args, **kwargs)
 
+        # Incremented every time the stored data is replaced so that views
+        # holding converted copies of the data know to discard them.
+        self._data_version = 0
+
         self.setData(name, self.NameRole)
         self.setData(identifier, self.IdRole)
         self.setData(data, self.DataRole)
@@ -39,6 +51,14 @@ class DataItem(QStandardItem):
     def name(self, value):
         self.setData(value, self.NameRole)
 
+    @property
+    def data_version(self):
+        """
+        Value identifying the current state of the stored data. It changes
+        every time :meth:`set_data` or :meth:`invalidate` is called.
+        """
+        return self._data_version
+
     @property
     def flux(self):
         return self.data(self.DataRole).flux
@@ -55,12 +75,188 @@ class DataItem(QStandardItem):
         """
         Updates the stored :class:`~specutils.Spectrum1D` data values.
         """
+        self.invalidate()
         self.setData(data, self.DataRole)
 
+    def invalidate(self):
+        """
+        Marks the data values as changed without replacing the stored data,
+        for items computing their values dynamically. Views discard their
+        converted copies of the data.
+        """
+        self._data_version += 1
+
     @property
     def spectrum(self):
         return self.data(self.DataRole)
 
+    def are_units_compatible(self, spectral_axis_unit, data_unit):
+        """
+        Whether the data can be displayed in the given units. This only
+        looks at the stored data, so no :class:`PlotDataItem` (with its
+        converted arrays) is needed to find out.
+        """
+        return self.is_data_unit_compatible(data_unit) and \
+            self.is_spectral_axis_unit_compatible(spectral_axis_unit)
+
+    def is_data_unit_compatible(self, unit):
+        return (self.flux.unit == "" or
+                unit is not None and
+                self.flux.unit.is_equivalent(
+                    unit, equivalencies=spectral_density(self.spectral_axis)))
+
+    def is_spectral_axis_unit_compatible(self, unit):
+        return (self.spectral_axis.unit == "" or
+                unit is not None and
+                self.spectral_axis.unit.is_equivalent(
+                    unit, equivalencies=spectral()))
+
+
+class LevelOfDetail:
+    """
+    Min/max envelope pyramid used to draw long spectra at screen resolution.
+
+    Each level of the pyramid reduces blocks of ``factor ** level`` samples of
+    the original data to their minimum and maximum values. Drawing each block
+    as a min/max pair keeps narrow emission and absorption features visible
+    regardless of how many samples fall within a single pixel.
+
+    Parameters
+    ----------
+    x : :class:`~numpy.ndarray`
+        Monotonic spectral axis values.
+    y : :class:`~numpy.ndarray`
+        Data values at each spectral axis value.
+    factor : int
+        Number of blocks of one level combined into a block of the next.
+    """
+    def __init__(self, x, y, factor=4):
+        x = np.asarray(x)
+        y = np.asarray(y, dtype=float)
+
+        # Windows are located with binary searches on the spectral axis, which
+        # therefore has to be increasing. The drawn step curve is the same
+        # regardless of the direction in which it is traversed.
+        self._reversed = bool(x.size > 1 and x[0] > x[-1])
+
+        if self._reversed:
+            x, y = x[::-1], y[::-1]
+
+        self._x = x
+        self._factor = factor
+        self._levels = [(y, y)]
+
+        mins, maxs = y, y
+
+        while mins.size > 1:
+            mins = self._reduce(mins, np.fmin)
+            maxs = self._reduce(maxs, np.fmax)
+            self._levels.append((mins, maxs))
+
+    def _reduce(self, values, ufunc):
+        # Pad with NaNs, which `fmin` and `fmax` ignore, so that the values
+        # can be reshaped into complete blocks.
+        pad = -values.size % self._factor
+
+        if pad:
+            values = np.append(values, np.full(pad, np.nan))
+
+        return ufunc.reduce(values.reshape(-1, self._factor), axis=1)
+
+    @staticmethod
+    def is_supported(x):
+        """
+        Whether a pyramid can be built over the spectral axis `x`.
+        """
+        diff = np.diff(x)
+
+        return bool(np.all(diff >= 0) or np.all(diff <= 0))
+
+    def bounds(self, axis):
+        """
+        The full extent of the data along the given plot axis (0 for the
+        spectral axis, 1 for the data values).
+        """
+        if axis == 0:
+            return self._x[0], self._x[-1]
+
+        mins, maxs = self._levels[-1]
+
+        return mins[0], maxs[0]
+
+    def window(self, x_min, x_max, width):
+        """
+        Determines the pyramid level and block range needed to draw the data
+        between `x_min` and `x_max` across `width` pixels.
+
+        Returns
+        -------
+        level, first, last : int
+            The pyramid level and the range of blocks within that level.
+        """
+        size = self._x.size
+        start = max(np.searchsorted(self._x, x_min, side='right') - 1, 0)
+        stop = min(np.searchsorted(self._x, x_max, side='left') + 1, size)
+
+        # Use the coarsest level that still provides at least one block per
+        # pixel; each block is drawn as two points.
+        samples_per_pixel = (stop - start) / max(width, 1)
+        level = 0
+
+        while (level + 1 < len(self._levels) and
+               self._factor ** (level + 1) <= samples_per_pixel):
+            level += 1
+
+        block = self._factor ** level
+
+        return level, start // block, -(-stop // block)
+
+    def source_slice(self, first, last):
+        """
+        The slice of the original `x` and `y` arrays holding the samples of a
+        full resolution (level 0) window returned by :meth:`window`.
+        """
+        if self._reversed:
+            size = self._x.size
+
+            return slice(size - last, size - first)
+
+        return slice(first, last)
+
+    def arrays(self, level, first, last):
+        """
+        Step mode ready arrays for a window returned by :meth:`window`.
+
+        Returns
+        -------
+        edges, values : :class:`~numpy.ndarray`
+            The bin edges, one element longer than the values.
+        """
+        size = self._x.size
+        mins, maxs = self._levels[level]
+        mins, maxs = mins[first:last], maxs[first:last]
+
+        if level == 0:
+            edges = np.append(self._x[first:last], self._x[min(last, size - 1)])
+
+            return edges, mins
+
+        block = self._factor ** level
+        starts = np.arange(first, last) * block
+
+        # Split every block in two bins holding its maximum and minimum so
+        # that the step curve draws a vertical bar spanning the envelope.
+        edges = np.empty(2 * mins.size + 1)
+        edges[0:-1:2] = self._x[starts]
+        edges[1:-1:2] = self._x[np.minimum(starts + block // 2, size - 1)]
+        edges[-1] = self._x[min(last * block, size - 1)]
+
+        values = np.empty(2 * mins.size)
+        values[0::2] = maxs
+        values[1::2] = mins
+
+        return edges, values
+
 
 class PlotDataItem(pg.PlotDataItem):
     data_unit_changed = Signal(str)
@@ -79,6 +275,16 @@ class PlotDataItem(pg.PlotDataItem):
         self._width = 1
         self._visible = False
 
+        # Cache of the data arrays converted to the current display units.
+        # Entries are only valid for the cache key under which they were
+        # stored; see `_cached`.
+        self._converted_cache = {}
+        self._converted_cache_key = None
+
+        # The pyramid window currently handed to pyqtgraph when drawing a
+        # decimated version of the data.
+        self._lod_window = None
+
         # Include error bar item
         self._error_bar_item = pg.ErrorBarItem(pen=[128, 128, 128, 200])
 
@@ -116,40 +322,75 @@ class PlotDataItem(pg.PlotDataItem):
 
     @data_unit.setter
     def data_unit(self, value):
+        # Converted arrays are keyed on the units, so there is nothing to
+        # re-compute or re-draw unless the unit actually changes.
+        if value == self._data_unit:
+            return
+
         self._data_unit = value
         self.data_unit_changed.emit(self._data_unit)
 
+    def _cached(self, name, convert):
+        """
+        Returns the converted value stored under `name`, calling `convert` to
+        compute it if the cache is empty or was built for different data or
+        units.
+        """
+        key = (id(self.data_item.spectrum), self.data_item.data_version,
+               self._data_unit, self._spectral_axis_unit)
+
+        if key != self._converted_cache_key:
+            self._converted_cache = {}
+            self._converted_cache_key = key
+
+        if name not in self._converted_cache:
+            self._converted_cache[name] = convert()
+
+        return self._converted_cache[name]
+
     @property
     def error_bar_item(self):
-        spectral_axis = self.spectral_axis
+        return self._error_bar_item
+
+    def _update_error_bars(self):
+        """
+        Hands the error bar item the uncertainties to draw. While a decimated
+        version of the data is drawn, error bars are hidden; once zoomed in to
+        full resolution, only those of the samples in view are drawn.
+        """
+        uncertainty = self.uncertainty
+        lod = self.level_of_detail
+
+        if uncertainty is None:
+            indices = slice(0, 0)
+        elif lod is not None:
+            level, first, last = self._lod_window
+            indices = lod.source_slice(first, last) if level == 0 else slice(0, 0)
+        else:
+            indices = slice(None)
+
+        spectral_axis = self.spectral_axis[indices]
 
         # If step mode is one, offset the error bars by a half delta so that
-        # they cross the middle of the bin.
-        if self.opts.get('stepMode'):
+        # they cross the middle of the bin. Avoid modifying the cached array
+        # in place.
+        if self.opts.get('stepMode') and spectral_axis.size > 1:
             diff = np.diff(spectral_axis)
-            spectral_axis += np.append(diff, diff[-1]) * 0.5
-
-        self._error_bar_item.setData(x=spectral_axis,
-                                     y=self.flux,
-                                     height=self.uncertainty)
+            spectral_axis = spectral_axis + np.append(diff, diff[-1]) * 0.5
 
-        return self._error_bar_item
+        self._error_bar_item.setData(
+            x=spectral_axis, y=self.flux[indices],
+            height=uncertainty[indices] if uncertainty is not None else None)
 
     def are_units_compatible(self, spectral_axis_unit, data_unit):
-        return self.is_data_unit_compatible(data_unit) and \
-            self.is_spectral_axis_unit_compatible(spectral_axis_unit)
+        return self.data_item.are_units_compatible(spectral_axis_unit,
+                                                   data_unit)
 
     def is_data_unit_compatible(self, unit):
-        return (self.data_item.flux.unit == "" or
-                unit is not None and
-                self.data_item.flux.unit.is_equivalent(
-                    unit, equivalencies=spectral_density(self.spectral_axis*u.Unit(self.spectral_axis_unit))))
+        return self.data_item.is_data_unit_compatible(unit)
 
     def is_spectral_axis_unit_compatible(self, unit):
-        return (self.data_item.spectral_axis.unit == "" or
-                unit is not None and
-                self.data_item.spectral_axis.unit.is_equivalent(
-                    unit, equivalencies=spectral()))
+        return self.data_item.is_spectral_axis_unit_compatible(unit)
 
     @property
     def spectral_axis_unit(self):
@@ -157,6 +398,9 @@ class PlotDataItem(pg.PlotDataItem):
 
     @spectral_axis_unit.setter
     def spectral_axis_unit(self, value):
+        if value == self._spectral_axis_unit:
+            return
+
         self._spectral_axis_unit = value
         self.spectral_axis_unit_changed.emit(self._spectral_axis_unit)
 
@@ -169,26 +413,35 @@ class PlotDataItem(pg.PlotDataItem):
         """
         Converts data_item.flux - which consists of the flux axis with units - into the new flux unit
         """
-        return self.data_item.flux.to(self.data_unit,
-                                      equivalencies=spectral_density(
-                                          self.spectral_axis * u.Unit(self.spectral_axis_unit))).value
+        def convert():
+            return self.data_item.flux.to(self.data_unit,
+                                          equivalencies=spectral_density(
+                                              self.spectral_axis * u.Unit(self.spectral_axis_unit))).value
+
+        return self._cached('flux', convert)
 
     @property
     def spectral_axis(self):
-        return self.data_item.spectral_axis.to(self.spectral_axis_unit or "",
-                                               equivalencies=spectral()).value
+        def convert():
+            return self.data_item.spectral_axis.to(self.spectral_axis_unit or "",
+                                                   equivalencies=spectral()).value
+
+        return self._cached('spectral_axis', convert)
 
     @property
     def uncertainty(self):
         if self.data_item.uncertainty is None:
             return
 
-        uncertainty = self.data_item.uncertainty.array * \
-                      self.data_item.uncertainty.unit
+        def convert():
+            uncertainty = self.data_item.uncertainty.array * \
+                          self.data_item.uncertainty.unit
+
+            return uncertainty.to(self.data_unit or "",
+                                  equivalencies=spectral_density(
+                                      self.spectral_axis * u.Unit(self.spectral_axis_unit))).value
 
-        return uncertainty.to(self.data_unit or "",
-                              equivalencies=spectral_density(
-                                  self.spectral_axis * u.Unit(self.spectral_axis_unit))).value
+        return self._cached('uncertainty', convert)
 
     @property
     def color(self):
@@ -228,22 +481,97 @@ class PlotDataItem(pg.PlotDataItem):
         self._visible = value
         self.visibility_changed.emit(self._visible)
 
+    @property
+    def level_of_detail(self):
+        """
+        The :class:`LevelOfDetail` pyramid used to draw this item, or `None`
+        if the full data is drawn.
+        """
+        def build():
+            spectral_axis = self.spectral_axis
+
+            if (not self.opts.get('stepMode') or
+                    spectral_axis.size < LOD_SAMPLE_THRESHOLD or
+                    not LevelOfDetail.is_supported(spectral_axis)):
+                return
+
+            return LevelOfDetail(spectral_axis, self.flux)
+
+        return self._cached('level_of_detail', build)
+
+    def _update_level_of_detail(self):
+        """
+        Hands pyqtgraph the decimated data for the current view range.
+        """
+        lod = self.level_of_detail
+
+        if lod is None:
+            return
+
+        view_box = self.getViewBox()
+
+        if view_box is None or view_box.width() == 0:
+            x_min, x_max = lod.bounds(0)
+            width = LOD_DEFAULT_WIDTH
+        else:
+            (x_min, x_max), _ = view_box.viewRange()
+            width = view_box.width()
+
+        window = lod.window(x_min, x_max, width)
+
+        if window == self._lod_window:
+            return
+
+        self._lod_window = window
+        self.setData(*lod.arrays(*window), connect="finite")
+        self._update_error_bars()
+
+    def viewRangeChanged(self):
+        super(PlotDataItem, self).viewRangeChanged()
+
+        self._update_level_of_detail()
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        """
+        Reports the bounds of the full data rather than those of the
+        decimated data currently drawn so that auto ranging is unaffected by
+        the level of detail.
+
+        Percentile (``frac``) and ``orthoRange`` restricted bounds, as well
+        as the bounds of items not drawn through a level of detail, are left
+        to pyqtgraph.
+        """
+        lod = self.level_of_detail
+
+        if (lod is None or self._lod_window is None or frac != 1.0 or
+                orthoRange is not None):
+            return super(PlotDataItem, self).dataBounds(
+                ax, frac=frac, orthoRange=orthoRange)
+
+        return lod.bounds(ax)
+
     def set_data(self):
         """
         Sets the spectral_axis and flux. self.flux is called to convert flux units if they had been changed
         """
-        spectral_axis = self.spectral_axis
+        # Converted arrays are only re-computed if the data or the units
+        # changed since they were cached. Items computing their values
+        # dynamically signal changes through `DataItem.invalidate`.
+        self._lod_window = None
+
+        if self.level_of_detail is not None:
+            self._update_level_of_detail()
+        else:
+            spectral_axis = self.spectral_axis
 
-        if self.opts.get('stepMode'):
-            spectral_axis = np.append(self.spectral_axis, self.spectral_axis[-1])
+            if self.opts.get('stepMode'):
+                spectral_axis = np.append(spectral_axis, spectral_axis[-1])
 
-        self.setData(spectral_axis, self.flux, connect="finite")
+            self.setData(spectral_axis, self.flux, connect="finite")
 
-        # Without this call, the plot tries to do autoRange based on DataItem (which does not change), when it should
-        # instead be doing autoRange based on PlotDataItem, which updates based on what units are being used
-        self._error_bar_item.setData(x=self.spectral_axis,
-                                     y=self.flux,
-                                     height=self.uncertainty)
+            # Without this call, the plot tries to do autoRange based on DataItem (which does not change), when it should
+            # instead be doing autoRange based on PlotDataItem, which updates based on what units are being used
+            self._update_error_bars()
 
 
 class ModelItem(QStandardItem):
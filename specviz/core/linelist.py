@@ -7,13 +7,18 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 import os
 import glob
+import hashlib
+import json
+import re
+import tempfile
 import yaml
 
 import numpy as np
 
 from astropy.io import ascii
-from astropy.table import Table, vstack
+from astropy.table import Column, MaskedColumn, Table
 from astropy import constants
+from astropy import units as u
 from astropy.units.core import UnitConversionError
 
 
@@ -23,7 +28,11 @@ __all__ = [
     'ingest',
     'populate_linelists_cache',
     'descriptions',
+    'search',
+    'search_index',
     'LineList',
+    'LineListDescriptor',
+    'LineSearchIndex',
 ]
 
 # yaml specs
@@ -37,18 +46,41 @@ ID_COLUMN = 'Species'
 UNITS_COLUMN = 'units'
 TOOLTIP_COLUMN = 'tooltip'
 
-# plotting helpers
+# plotting helpers. The plotted lines are displayed with these columns,
+# which are computed from the lists the lines were merged from; they are
+# not stored in the merged table, so they are not exported with it.
 REDSHIFTED_WAVELENGTH_COLUMN = 'z_wavelength'
 COLOR_COLUMN = 'color'
 HEIGHT_COLUMN = 'height'
-MARKER_COLUMN = 'marker'
 DEFAULT_HEIGHT = 0.75
 
-# columns to remove when exporting the plotted lines
-columns_to_remove = [REDSHIFTED_WAVELENGTH_COLUMN, COLOR_COLUMN, HEIGHT_COLUMN, MARKER_COLUMN]
+# Pre-parsed binary copies of the line list files are stored in this
+# directory, so that each ASCII file is only parsed once. Entries are keyed
+# on the modification time and size of the source file, and on the columns
+# described in its YAML file.
+LINELISTS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.specviz',
+                                   'linelists')
+_CACHE_FORMAT_VERSION = 3
 
+# Registry of LineListDescriptor instances, one per known line list. The
+# full tables are only read when a list is actually used.
 _linelists_cache = []
 
+# Wavelengths of all lists are compared in these units when searching.
+SEARCH_UNIT = u.AA
+
+# Half width of the range searched around a single wavelength,
+# relative to that wavelength.
+SEARCH_TOLERANCE = 1.e-3
+
+# Index of all lists in the cache, built by the first search.
+_search_index = None
+
+
+def _get_linelists_path():
+    linelist_path = os.path.dirname(os.path.abspath(__file__))
+    return linelist_path + '/../data/linelists/'
+
 
 def get_from_file(linelist_path, filename):
 
@@ -62,7 +94,7 @@ def get_from_file(linelist_path, filename):
         table = Table.read(filename, format='ascii.ecsv')
 
         linelist = LineList(table, name=os.path.split(filename)[1])
-        _linelists_cache.append(linelist)
+        _linelists_cache.append(LineListDescriptor.from_linelist(linelist))
 
         return linelist
 
@@ -71,22 +103,256 @@ def get_from_file(linelist_path, filename):
 
 
 # This should be called at the appropriate time when starting the
-# app, so the lists are cached for speedier access later on.
+# app. Only the YAML descriptors (and the summaries stored alongside
+# the pre-parsed tables) are read here; each list is parsed the first
+# time it is needed.
 def populate_linelists_cache():
-    # we could benefit from a threaded approach here. But I couldn't
-    # see the benefits, since the reading of even the largest line
-    # list files takes a fraction of a second at most.
-    linelist_path = os.path.dirname(os.path.abspath(__file__))
-    linelist_path +=  '/../data/linelists/'
-    yaml_paths = glob.glob(linelist_path + '*.yaml')
+    linelist_path = _get_linelists_path()
+    yaml_paths = sorted(glob.glob(linelist_path + '*.yaml'))
 
     for yaml_filename in yaml_paths:
-        linelist = get_from_file(linelist_path, yaml_filename)
-        _linelists_cache.append(linelist)
+        with open(yaml_filename, 'r') as yaml_file:
+            yaml_object = yaml.safe_load(yaml_file)
+
+        _linelists_cache.append(
+            LineListDescriptor.from_yaml(linelist_path, yaml_object))
 
 
 def get_from_cache(index):
-    return _linelists_cache[index]
+    return _linelists_cache[index].linelist
+
+
+class LineListDescriptor(object):
+    """
+    Lightweight registry entry for a line list.
+
+    The name, line count and wavelength range of the list are available
+    without reading the list itself, which is only loaded the first time
+    `linelist` is accessed.
+
+    Parameters
+    ----------
+    name: str
+        The name of the list.
+
+    loader: callable
+        Called without arguments to read the full `LineList`.
+
+    summary: dict
+        The 'nlines', 'wmin', 'wmax' and 'units' of the list, if known.
+        Otherwise they are taken from the list once it is loaded.
+    """
+
+    def __init__(self, name, loader=None, summary=None):
+        self.name = name
+
+        self._loader = loader
+        self._summary = summary
+        self._linelist = None
+        self._description = None
+
+    @classmethod
+    def from_yaml(cls, linelist_path, yaml_object):
+        filename = linelist_path + os.path.sep + yaml_object['filename']
+
+        def loader():
+            return LineList.read_list(filename, yaml_object)
+
+        return cls(yaml_object['name'], loader,
+                   _read_table_summary(filename, yaml_object))
+
+    @classmethod
+    def from_linelist(cls, linelist):
+        descriptor = cls(linelist.name)
+        descriptor._linelist = linelist
+
+        return descriptor
+
+    @property
+    def is_loaded(self):
+        return self._linelist is not None
+
+    @property
+    def linelist(self):
+        if self._linelist is None:
+            self._linelist = self._loader()
+
+        return self._linelist
+
+    @property
+    def summary(self):
+        if self._summary is None:
+            linelist = self.linelist
+            self._summary = {
+                'nlines': len(linelist),
+                'wmin': linelist.wmin,
+                'wmax': linelist.wmax,
+                'units': linelist[WAVELENGTH_COLUMN].unit}
+
+        return self._summary
+
+    @property
+    def nlines(self):
+        return self.summary['nlines']
+
+    @property
+    def wmin(self):
+        return self.summary['wmin']
+
+    @property
+    def wmax(self):
+        return self.summary['wmax']
+
+    @property
+    def units(self):
+        return u.Unit(self.summary['units'])
+
+    @property
+    def description(self):
+        if self._description is None:
+            self._description = '{:15}  ({:>d},  [ {:.2f} - {:.2f} ] {})'.format(
+                self.name, self.nlines, self.wmin, self.wmax, self.units)
+
+        return self._description
+
+    def overlaps(self, wrange):
+        """
+        Whether any line of the list may fall within `wrange`.
+
+        Raises `UnitConversionError` if the range cannot be expressed
+        in the units of the list.
+        """
+        if self.wmin is None:
+            return False
+
+        wmin = wrange[0].to(self.units, equivalencies=u.spectral()).value
+        wmax = wrange[1].to(self.units, equivalencies=u.spectral()).value
+
+        return self.wmin <= max(wmin, wmax) and self.wmax >= min(wmin, wmax)
+
+
+def _table_cache_path(filename):
+    # The hash of the full path distinguishes lists sharing a file name.
+    path_hash = hashlib.md5(
+        os.path.abspath(filename).encode('utf-8')).hexdigest()[:8]
+
+    return os.path.join(LINELISTS_CACHE_DIR, '{}-{}.npz'.format(
+        os.path.basename(filename), path_hash))
+
+
+def _table_cache_key(filename, yaml_object):
+    stat = os.stat(filename)
+
+    return json.dumps([_CACHE_FORMAT_VERSION, os.path.abspath(filename),
+                       stat.st_mtime, stat.st_size, yaml_object['format'],
+                       yaml_object['columns']], sort_keys=True, default=str)
+
+
+def _read_table_cache(filename, yaml_object):
+    """
+    Returns the table previously parsed from `filename`, or `None` if there
+    is no up to date pre-parsed copy.
+    """
+    try:
+        key = _table_cache_key(filename, yaml_object)
+
+        with np.load(_table_cache_path(filename)) as cached:
+            if str(cached['key']) != key:
+                return None
+
+            columns = []
+            for k, name in enumerate(cached['names']):
+                data = cached['data_{}'.format(k)]
+                mask_name = 'mask_{}'.format(k)
+
+                if mask_name in cached.files:
+                    columns.append(MaskedColumn(data, name=str(name),
+                                                mask=cached[mask_name]))
+                else:
+                    columns.append(Column(data, name=str(name)))
+
+            table = Table(columns, copy=False)
+
+            if 'comments' in cached.files:
+                table.meta['comments'] = [str(x) for x in cached['comments']]
+
+            return table
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _read_table_summary(filename, yaml_object):
+    """
+    Returns the summary stored with the pre-parsed copy of `filename`,
+    without reading the table itself, or `None` if there is no up to
+    date pre-parsed copy.
+    """
+    try:
+        key = _table_cache_key(filename, yaml_object)
+
+        with np.load(_table_cache_path(filename)) as cached:
+            if str(cached['key']) != key:
+                return None
+
+            summary = json.loads(str(cached['summary']))
+    except (OSError, KeyError, ValueError):
+        return None
+
+    for column in yaml_object['columns']:
+        if column[COLUMN_NAME] == WAVELENGTH_COLUMN:
+            summary['units'] = column.get(UNITS_COLUMN, '')
+
+    return summary
+
+
+def _write_table_cache(filename, yaml_object, table):
+    """
+    Stores a pre-parsed copy of the table read from `filename`. Failures
+    (e.g. a read-only home directory) are ignored; the list will simply be
+    parsed again next time.
+    """
+    arrays = {'names': np.array(table.colnames, dtype=str)}
+
+    for k, name in enumerate(table.colnames):
+        column = table[name]
+        arrays['data_{}'.format(k)] = np.asarray(column)
+
+        if isinstance(column, MaskedColumn):
+            arrays['mask_{}'.format(k)] = np.ma.getmaskarray(column)
+
+    if 'comments' in table.meta:
+        arrays['comments'] = np.array(table.meta['comments'], dtype=str)
+
+    wavelengths = np.asarray(table[WAVELENGTH_COLUMN], dtype=float)
+    summary = {'nlines': len(wavelengths), 'wmin': None, 'wmax': None}
+    if len(wavelengths):
+        summary['wmin'] = float(wavelengths.min())
+        summary['wmax'] = float(wavelengths.max())
+    arrays['summary'] = np.array(json.dumps(summary))
+
+    path = _table_cache_path(filename)
+    temp_path = None
+
+    try:
+        arrays['key'] = np.array(_table_cache_key(filename, yaml_object))
+
+        os.makedirs(LINELISTS_CACHE_DIR, exist_ok=True)
+
+        # Each writer uses its own temporary file, so that processes caching
+        # the same list at the same time do not write into each other's file.
+        with tempfile.NamedTemporaryFile(dir=LINELISTS_CACHE_DIR,
+                                         suffix='.tmp',
+                                         delete=False) as temp_file:
+            temp_path = temp_file.name
+            np.savez(temp_file, **arrays)
+
+        os.replace(temp_path, path)
+    except OSError:
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
 
 
 def ingest(range):
@@ -107,10 +373,12 @@ def ingest(range):
         The list of linelists found.
     """
     result = []
-    for linelist in _linelists_cache:
+    for descriptor in _linelists_cache:
         try:
-            ll = linelist.extract_range(range)
-            result.append(ll)
+            # Lists known to lie outside the range are not loaded.
+            if descriptor.overlaps(range):
+                ll = descriptor.linelist.extract_range(range)
+                result.append(ll)
         except UnitConversionError as err:
             pass
 
@@ -126,18 +394,355 @@ def descriptions():
     list
         The list of strings.
     """
-    result = []
-    for linelist in _linelists_cache:
+    return [descriptor.description for descriptor in _linelists_cache]
+
+
+def search_index():
+    """
+    Returns the search index of all line lists in the cache.
+
+    The index is built the first time it is needed, which loads
+    every list, and is built again when lists are added to the cache.
+
+    Returns
+    -------
+    LineSearchIndex
+        The index.
+    """
+    global _search_index
+
+    if _search_index is None or len(_search_index.linelists) != len(_linelists_cache):
+        _search_index = LineSearchIndex(
+            [descriptor.linelist for descriptor in _linelists_cache])
+
+    return _search_index
+
+
+def search(query, units=None):
+    """
+    Searches lines across all line lists in the cache.
+
+    Parameters
+    ----------
+    query: str
+        A species name prefix (e.g. 'Fe II', '[OIII]'), a wavelength
+        (e.g. '6563', '656.3 nm') or a wavelength range (e.g. '6500-6600').
+        See `LineSearchIndex.query`.
+    units: Unit, optional
+        The wavelength units of the result. Default to `SEARCH_UNIT`.
+
+    Returns
+    -------
+    LineList
+        The lines found in all lists, merged into a single list
+        sorted by wavelength, or `None` if no line was found.
+    """
+    matches = search_index().query(query)
+    if len(matches) == 0:
+        return None
+
+    lists = [linelist.extract_rows(rows) for linelist, rows in matches]
+
+    result = LineList.merge(lists, units if units is not None else SEARCH_UNIT)
+    result.name = query
+
+    return result
+
+
+def _species_key(name):
+    # species names are compared regardless of case, spacing and
+    # forbidden line brackets, so that e.g. 'oiii' finds '[O III]'.
+    return ''.join(c for c in str(name).lower()
+                   if not c.isspace() and c not in '[]')
+
+
+# a wavelength, or two wavelengths separated by '-', ',' or 'to',
+# optionally followed by units.
+_WAVELENGTH_QUERY = re.compile(
+    r'^\s*(\d+\.?\d*(?:[eE][-+]?\d+)?)'
+    r'(?:\s*(?:-|,|to)\s*(\d+\.?\d*(?:[eE][-+]?\d+)?))?'
+    r'\s*(.*?)\s*$')
+
+# unit names that users are likely to type, but that astropy parses
+# differently (e.g. 'A' is the Ampere).
+_QUERY_UNIT_ALIASES = {
+    'a': u.AA,
+    'angstrom': u.AA,
+    '\u00c5': u.AA,
+}
+
+
+def _parse_wavelength_query(text, tolerance=SEARCH_TOLERANCE):
+    """
+    Returns the (wmin, wmax) range designated by a query string, or
+    `None` if the string doesn't designate wavelengths.
+    """
+    match = _WAVELENGTH_QUERY.match(text)
+    if match is None:
+        return None
+
+    first, second, unit_name = match.groups()
+
+    if unit_name:
+        unit = _QUERY_UNIT_ALIASES.get(unit_name.lower())
+        if unit is None:
+            try:
+                unit = u.Unit(unit_name)
+                unit.to(SEARCH_UNIT, equivalencies=u.spectral())
+            except (ValueError, TypeError, UnitConversionError):
+                return None
+    else:
+        unit = SEARCH_UNIT
+
+    if second is None:
+        value = float(first)
+        wrange = (value * (1. - tolerance), value * (1. + tolerance))
+    else:
+        wrange = (float(first), float(second))
+
+    return wrange[0] * unit, wrange[1] * unit
+
+
+class LineSearchIndex(object):
+    """
+    Index of the lines of several line lists, used to search
+    lines by species or by wavelength in all lists at once.
+
+    Species names are stored sorted, so that all the names that
+    start with a given prefix are found with two binary searches,
+    as with a prefix tree, and the lines of each species are stored
+    next to each other. Wavelengths of all lists are converted to
+    `SEARCH_UNIT` and sorted. The cost of a query thus depends on
+    the number of lines found, not on the number of lines indexed.
+
+    Parameters
+    ----------
+    linelists: list of LineList
+        The lists to index.
+    """
+    def __init__(self, linelists):
+        self.linelists = list(linelists)
+
+        sizes = [len(linelist) for linelist in self.linelists]
+
+        # lines are numbered in the order of the lists, then of the
+        # rows in each list.
+        self._offsets = np.concatenate(([0], np.cumsum(sizes))).astype(int)
+
+        wavelengths = []
+        codes = []
+        names = []
+        for linelist in self.linelists:
+            try:
+                wavelengths.append(linelist.wavelengths_in(SEARCH_UNIT))
+            except (TypeError, UnitConversionError):
+                wavelengths.append(np.full(len(linelist), np.nan))
+
+            if ID_COLUMN in linelist.colnames:
+                species = np.asarray(linelist[ID_COLUMN]).astype(str)
+                uniques, inverse = np.unique(species, return_inverse=True)
+                codes.append(inverse.ravel() + len(names))
+                names.extend(_species_key(x) for x in uniques)
+            else:
+                codes.append(np.full(len(linelist), -1))
+
+        # wavelength index. Lines without a valid wavelength are left out.
+        wavelengths = np.concatenate(wavelengths + [np.zeros(0)])
+        order = np.argsort(wavelengths, kind='mergesort')
+        nvalid = np.count_nonzero(~np.isnan(wavelengths))
+
+        self._wavelengths = wavelengths[order[:nvalid]]
+        self._wavelength_lines = order[:nvalid]
+
+        # species index. Names that differ only by their spelling in
+        # the different lists share the same entry.
+        self._species_names, inverse = np.unique(
+            np.array(names, dtype=str), return_inverse=True)
+
+        codes = np.concatenate(codes + [np.zeros(0, dtype=int)])
+        has_species = codes >= 0
+        codes[has_species] = inverse.ravel()[codes[has_species]]
+        codes[~has_species] = len(self._species_names)
+
+        self._species_lines = np.argsort(codes, kind='mergesort')
+        self._species_offsets = np.searchsorted(
+            codes[self._species_lines], np.arange(len(self._species_names) + 1))
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def find_species(self, prefix):
+        """
+        Finds the lines whose species name starts with `prefix`,
+        or only the lines of that species if `prefix` is a full
+        species name. Case, spaces and brackets are not taken
+        into account when comparing names.
 
-        desc = linelist.name
-        nlines = len(linelist[WAVELENGTH_COLUMN])
-        w1 = linelist.wmin
-        w2 = linelist.wmax
-        units = linelist[WAVELENGTH_COLUMN].unit
+        Parameters
+        ----------
+        prefix: str
+            The beginning of the species name.
+
+        Returns
+        -------
+        [(LineList, ndarray), ...]
+            Each list with lines found, with the rows of those lines.
+        """
+        key = _species_key(prefix)
+
+        # a full name only finds that species, so that e.g. 'Fe II'
+        # doesn't find 'Fe III' as well.
+        first = np.searchsorted(self._species_names, key, side='left')
+        last = np.searchsorted(self._species_names, key, side='right')
+
+        if first == last:
+            last = np.searchsorted(self._species_names, key + '\U0010ffff', side='left')
+
+        lines = self._species_lines[
+            self._species_offsets[first]:self._species_offsets[last]]
+
+        return self._matches(lines)
+
+    def find_wavelengths(self, wmin, wmax):
+        """
+        Finds the lines whose wavelength lies within a range.
+
+        Parameters
+        ----------
+        wmin, wmax: Quantity
+            The range limits, in any spectral units.
+
+        Returns
+        -------
+        [(LineList, ndarray), ...]
+            Each list with lines found, with the rows of those lines.
+        """
+        wmin = wmin.to(SEARCH_UNIT, equivalencies=u.spectral()).value
+        wmax = wmax.to(SEARCH_UNIT, equivalencies=u.spectral()).value
 
-        description = '{:15}  ({:>d},  [ {:.2f} - {:.2f} ] {})'.format(desc, nlines, w1, w2, units)
+        first = np.searchsorted(self._wavelengths, min(wmin, wmax), side='left')
+        last = np.searchsorted(self._wavelengths, max(wmin, wmax), side='right')
+
+        return self._matches(self._wavelength_lines[first:last])
+
+    def query(self, text, tolerance=SEARCH_TOLERANCE):
+        """
+        Finds the lines designated by a query string.
+
+        A number, optionally followed by units, finds the lines within
+        `tolerance` (relative) of that wavelength. Two numbers separated
+        by '-', ',' or 'to' find the lines within that range. Units
+        default to `SEARCH_UNIT`. Any other string is taken as the
+        beginning of a species name.
+
+        Parameters
+        ----------
+        text: str
+            The query, e.g. '6563', '650-660 nm', 'Fe II'.
+        tolerance: float
+            Relative half width of the range searched around
+            a single wavelength.
+
+        Returns
+        -------
+        [(LineList, ndarray), ...]
+            Each list with lines found, with the rows of those lines.
+        """
+        wrange = _parse_wavelength_query(text, tolerance)
+        if wrange is not None:
+            return self.find_wavelengths(*wrange)
+
+        return self.find_species(text)
+
+    def _matches(self, lines):
+        # splits line numbers into rows of each list.
+        lines = np.sort(lines)
+        bounds = np.searchsorted(lines, self._offsets)
+
+        return [(linelist, lines[bounds[k]:bounds[k+1]] - self._offsets[k])
+                for k, linelist in enumerate(self.linelists)
+                if bounds[k+1] > bounds[k]]
+
+
+def _redshifted(values, unit, factor):
+    """
+    Applies a (1 + z) factor to spectral axis values. Values
+    in units other than length (frequency, energy or wave
+    number) are inversely proportional to the wavelength.
+    """
+    if u.Unit(unit).physical_type == 'length':
+        return values * factor
 
-        result.append(description)
+    return values / factor
+
+
+def _merge_positions(sorted_arrays):
+    """
+    Computes where each element of a set of sorted arrays
+    lands in the sorted concatenation of all of them.
+
+    The arrays are concatenated and sorted once with a stable
+    sort. Numpy's stable sort is a timsort, which finds the
+    sorted runs the arrays form and merges them, so this
+    costs O(n log k) for k arrays with n elements in total.
+    Ties are broken by array order.
+
+    Parameters
+    ----------
+    sorted_arrays: [ndarray, ...]
+        Arrays sorted in increasing order.
+
+    Returns
+    -------
+    [ndarray, ...]
+        The positions of the elements of each array.
+    """
+    if len(sorted_arrays) == 0:
+        return []
+
+    order = np.argsort(np.concatenate(sorted_arrays), kind='stable')
+
+    positions = np.empty_like(order)
+    positions[order] = np.arange(len(order))
+
+    bounds = np.cumsum([len(x) for x in sorted_arrays])[:-1]
+
+    return np.split(positions, bounds)
+
+
+def _merge_arrays(arrays, positions, size, masked=False):
+    """
+    Scatters arrays into a new array of the given size, at
+    the positions computed by `_merge_positions`.
+
+    Arrays of incompatible types are merged as strings. When
+    `masked` is set, `None` entries stand for missing arrays,
+    and the mask of the missing elements (or `None` if there
+    are none) is returned along with the merged array.
+    """
+    present = [x for x in arrays if x is not None]
+
+    try:
+        dtype = np.result_type(*present)
+    except TypeError:
+        present = [x.astype(str) for x in present]
+        arrays = [None if x is None else x.astype(str) for x in arrays]
+        dtype = np.result_type(*present)
+
+    result = np.zeros(size, dtype=dtype)
+    mask = np.zeros(size, dtype=bool)
+
+    for array, position in zip(arrays, positions):
+        if array is None:
+            mask[position] = True
+        elif np.ma.isMaskedArray(array):
+            mask[position] = np.ma.getmaskarray(array)
+            result[position] = array.data
+        else:
+            result[position] = array
+
+    if masked:
+        return result, (mask if mask.any() else None)
 
     return result
 
@@ -161,16 +766,17 @@ class LineList(Table):
         If true, a masked table is used.
     """
 
-    def __init__(self, table=None, tooltips=None, name=None, masked=None):
-        Table.__init__(self, data=table, masked=masked)
+    def __init__(self, table=None, tooltips=None, name=None, masked=None,
+                 copy=True):
+        Table.__init__(self, data=table, masked=masked, copy=copy)
 
         self.name = name
 
-        # We have to carry internally a raw reference to the
-        # table data so as to be able to use vstack() to perform
-        # merging. This shouldn't be a problem as long as the
-        # LineList instance is regarded as immutable. Which it
-        # should be anyways.
+        # We carry internally a raw reference to the table data,
+        # which is used e.g. when exporting the plotted lines.
+        # This shouldn't be a problem as long as the LineList
+        # instance is regarded as immutable. Which it should be
+        # anyways.
 
         self._table = table
 
@@ -180,20 +786,92 @@ class LineList(Table):
         self.redshift = 0.
         self. z_units = 'z'
 
-        if len(table[WAVELENGTH_COLUMN].data):
-            self.wmin = table[WAVELENGTH_COLUMN].data.min()
-            self.wmax = table[WAVELENGTH_COLUMN].data.max()
-        else:
-            self.wmin = self.wmax = None
-
         # A line list (but not the underlying table) can have
         # tool tips associated to each column.
         self.tooltips = tooltips
 
+        # Lists built by merge() keep the lists they were merged
+        # from, and the index of the list each line comes from.
+        self.source_lists = None
+        self.source_index = None
+
+        # Sorted wavelengths, built the first time they are needed.
+        self._wavelength_index = None
+
+        # Wavelengths converted to other units, by unit. Lists
+        # extracted from another list take their converted
+        # wavelengths from the parent list, so that a conversion
+        # is done only once on the full list.
+        self._converted_wavelengths = {}
+        self._parent = None
+        self._parent_rows = None
+
     @property
     def table(self):
         return self._table
 
+    @property
+    def wavelength_index(self):
+        """
+        The wavelength values sorted in increasing order, in the units
+        of the wavelength column, and the row order that sorts them
+        (`None` when the rows are already sorted).
+        """
+        if self._wavelength_index is None:
+            wavelengths = np.asarray(self[WAVELENGTH_COLUMN], dtype=float)
+
+            order = None
+            if np.any(wavelengths[1:] < wavelengths[:-1]):
+                order = np.argsort(wavelengths, kind='mergesort')
+                wavelengths = wavelengths[order]
+
+            self._wavelength_index = (wavelengths, order)
+
+        return self._wavelength_index
+
+    @property
+    def wmin(self):
+        wavelengths, _ = self.wavelength_index
+        return wavelengths[0] if len(wavelengths) else None
+
+    @property
+    def wmax(self):
+        wavelengths, _ = self.wavelength_index
+        return wavelengths[-1] if len(wavelengths) else None
+
+    def wavelengths_in(self, unit):
+        """
+        Returns the values of the wavelength column converted
+        to `unit`. Spectral equivalencies are used, so `unit`
+        can be e.g. a frequency or energy unit.
+
+        Converted values are cached for each unit, and must
+        not be modified.
+
+        Parameters
+        ----------
+        unit: Unit or str
+            The target units.
+
+        Returns
+        -------
+        ndarray
+            The converted values, in the row order of the list.
+        """
+        unit = u.Unit(unit)
+
+        if unit not in self._converted_wavelengths:
+            if self._parent is not None:
+                values = self._parent.wavelengths_in(unit)[self._parent_rows]
+            else:
+                values = self[WAVELENGTH_COLUMN].quantity.to(
+                    unit, equivalencies=u.spectral()).value
+
+            values.flags.writeable = False
+            self._converted_wavelengths[unit] = values
+
+        return self._converted_wavelengths[unit]
+
     @classmethod
     def read_list(cls, filename, yaml_object):
         names_list = []
@@ -220,19 +898,33 @@ class LineList(Table):
                 tooltip = yaml_object['columns'][k][TOOLTIP_COLUMN]
             tooltips_list.append(tooltip)
 
-        tab = ascii.read(filename, format = yaml_object['format'],
-                         names = names_list,
-                         col_starts = start_list,
-                         col_ends = end_list)
+        # Parsing the fixed width ASCII files is slow for the larger
+        # lists, so use the pre-parsed copy when there is one.
+        tab = _read_table_cache(filename, yaml_object)
 
-        for k, colname in enumerate(tab.columns):
-            tab[colname].unit = units_list[k]
+        if tab is None:
+            tab = ascii.read(filename, format = yaml_object['format'],
+                             names = names_list,
+                             col_starts = start_list,
+                             col_ends = end_list)
 
             # some line lists have a 'Reference' column that is
             # wrongly read as type int. Must be str instead,
             # otherwise an error is raised when merging.
-            if colname in ['Reference']:
-                tab[colname] = tab[colname].astype(str)
+            for colname in tab.columns:
+                if colname in ['Reference']:
+                    tab[colname] = tab[colname].astype(str)
+
+            # Store the lines sorted by wavelength, so that ranges
+            # can be extracted as slices of the table.
+            wavelengths = np.asarray(tab[WAVELENGTH_COLUMN])
+            if np.any(wavelengths[1:] < wavelengths[:-1]):
+                tab = tab[np.argsort(wavelengths, kind='mergesort')]
+
+            _write_table_cache(filename, yaml_object, tab)
+
+        for k, colname in enumerate(tab.columns):
+            tab[colname].unit = units_list[k]
 
         # The table name (for e.g. display purposes)
         # is taken from the 'name' element in the
@@ -243,8 +935,14 @@ class LineList(Table):
     @classmethod
     def merge(cls, lists, target_units):
         """
-        Executes a 'vstack' of all input lists, and
-        then sorts the result by the wavelength column.
+        Merges all input lists into a new list sorted by
+        the wavelength column.
+
+        The input lists are left untouched. Each one is
+        sorted by wavelength already (see `wavelength_index`),
+        so the merged order is found by locating the lines of
+        every list among the lines of the other lists, with
+        a binary search, instead of sorting the stacked lists.
 
         Parameters
         ----------
@@ -259,40 +957,95 @@ class LineList(Table):
         LineList
             merged line list
         """
-        tables = []
+        # wavelengths in the target units, and the row order
+        # that sorts them, for each input list.
+        wavelengths = []
+        orders = []
         for linelist in lists:
+            _, order = linelist.wavelength_index
+            if order is None:
+                order = np.arange(len(linelist))
 
-            # Note that vstack operates on Table instances but
-            # not on LineList instances. So we refer directly
-            # to the raw Table instances.
-
-            internal_table = linelist._table
-            internal_table[WAVELENGTH_COLUMN].convert_unit_to(target_units)
-
-            # add columns to hold color and height attributes
-            color_array = np.full(len(internal_table[WAVELENGTH_COLUMN]), linelist.color)
-            internal_table[COLOR_COLUMN] = color_array
-            height_array = np.full(len(internal_table[WAVELENGTH_COLUMN]), linelist.height)
-            internal_table[HEIGHT_COLUMN] = height_array
-
-            # add column to hold redshifted wavelength
-            f =  1. + linelist.redshift
-            if linelist.z_units == 'km/s':
-                f = 1. + linelist.redshift / constants.c.value * 1000.
-            z_wavelength = internal_table[WAVELENGTH_COLUMN] * f
-            internal_table[REDSHIFTED_WAVELENGTH_COLUMN] = z_wavelength
-
-            # add column to hold plot markers
-            marker_array = np.full(len(internal_table[WAVELENGTH_COLUMN]), None)
-            internal_table[MARKER_COLUMN] = marker_array
+            # conversions to e.g. frequency reverse the order.
+            values = linelist.wavelengths_in(target_units)[order]
+            if len(values) > 1 and values[0] > values[-1]:
+                order = order[::-1]
+                values = values[::-1]
 
-            tables.append(internal_table)
+            wavelengths.append(values)
+            orders.append(order)
 
-        merged_table = vstack(tables)
+        positions = _merge_positions(wavelengths)
+        nrows = sum(len(x) for x in wavelengths)
 
-        merged_table.sort(WAVELENGTH_COLUMN)
+        # columns are gathered in order of first appearance.
+        colnames = []
+        tooltips = []
+        for linelist in lists:
+            for k, colname in enumerate(linelist.colnames):
+                if colname not in colnames:
+                    colnames.append(colname)
+                    tooltip = ''
+                    if linelist.tooltips:
+                        tooltip = linelist.tooltips[k]
+                    tooltips.append(tooltip)
+
+        columns = []
+        for colname in colnames:
+            if colname == WAVELENGTH_COLUMN:
+                data = _merge_arrays(wavelengths, positions, nrows)
+                columns.append(Column(data, name=colname, unit=target_units))
+                continue
+
+            unit = None
+            values = []
+            for linelist, order in zip(lists, orders):
+                if colname not in linelist.colnames:
+                    values.append(None)
+                    continue
+
+                column = linelist[colname]
+                value = column.data[order]
+
+                if unit is None:
+                    unit = column.unit
+                elif column.unit is not None and column.unit != unit:
+                    try:
+                        value = column.unit.to(unit, value)
+                    except UnitConversionError:
+                        pass
+
+                values.append(value)
+
+            data, mask = _merge_arrays(values, positions, nrows, masked=True)
+
+            if mask is None:
+                columns.append(Column(data, name=colname, unit=unit))
+            else:
+                columns.append(MaskedColumn(data, name=colname, unit=unit,
+                                            mask=mask))
+
+        merged_table = Table(columns, copy=False)
+
+        comments = []
+        for linelist in lists:
+            comments.extend(linelist.meta.get('comments', []))
+        if comments:
+            merged_table.meta['comments'] = comments
+
+        result = cls(merged_table, tooltips=tooltips, name="Merged",
+                     copy=False)
+
+        # Color, height and redshift are not stored in the merged
+        # table. They stay attributes of the input lists, which are
+        # looked up through the index of the list each line comes
+        # from, so that they can be changed without re-merging.
+        result.source_lists = list(lists)
+        result.source_index = _merge_arrays(
+            [np.full(len(x), k) for k, x in enumerate(wavelengths)],
+            positions, nrows)
 
-        return cls(merged_table, "Merged")
+        return result
 
     def extract_range(self, wrange):
         """
@@ -317,14 +1070,60 @@ class LineList(Table):
         LineList
             line list with subset of lines
         """
-        wavelengths = self[WAVELENGTH_COLUMN].quantity
+        first, last = self._range_bounds(wrange)
+        _, order = self.wavelength_index
+
+        # A slice of a sorted list references the data of the
+        # list instead of copying it.
+        if order is None:
+            return self._new_from_rows(slice(first, last))
+
+        return self._new_from_rows(np.sort(order[first:last]))
+
+    def count_in_range(self, wrange):
+        """
+        Counts the lines that fall within a wavelength
+        range, without extracting them.
+
+        Parameters
+        ----------
+        wrange: (Quantity, Quantity)
+            minimum and maximum wavelength of the range
+
+        Returns
+        -------
+        int
+            number of lines in the range
+        """
+        first, last = self._range_bounds(wrange)
+
+        return int(last - first)
+
+    def _range_bounds(self, wrange):
+        """
+        Finds the lines that fall within a wavelength range
+        with a binary search in the sorted wavelengths.
 
-        wmin = wrange[0]
-        wmax = wrange[1]
+        Returns
+        -------
+        (int, int)
+            the first and one past the last positions of
+            the lines in `wavelength_index`.
+        """
+        wavelengths, _ = self.wavelength_index
+
+        unit = self[WAVELENGTH_COLUMN].unit
+        if unit is None:
+            unit = u.dimensionless_unscaled
+
+        # convert the end points of the range to the units
+        # of the line list, and find them in the sorted
+        # wavelengths.
+        wmin = wrange[0].to(unit, equivalencies=u.spectral()).value
+        wmax = wrange[1].to(unit, equivalencies=u.spectral()).value
 
-        # convert wavelenghts in line list to whatever
-        # units the wavelength range is expressed in.
-        new_wavelengths = wavelengths.to(wmin.unit)
+        # frequency or energy ranges are reversed in wavelength.
+        wmin, wmax = min(wmin, wmax), max(wmin, wmax)
 
         # add some leeway at the short and long end points.
         # For now, we extend both ends by 10%. This might
@@ -335,20 +1134,11 @@ class LineList(Table):
         # REMOVING THIS FOR NOW.
         # wmin = wmin.value - wmin.value * 0.1
         # wmax = wmax.value + wmax.value * 0.1
-        wmin = wmin.value
-        wmax = wmax.value
 
-        # 'indices' points to rows with wavelength values
-        # that lie outside the wavelength range.
-        indices_to_remove = np.where((new_wavelengths.value < wmin) |
-                                     (new_wavelengths.value > wmax))
+        first = np.searchsorted(wavelengths, wmin, side='left')
+        last = np.searchsorted(wavelengths, wmax, side='right')
 
-        result = self._remove_lines(indices_to_remove)
-
-        # new instance inherits the name from parent.
-        result.name = self.name
-
-        return result
+        return first, last
 
     def extract_rows(self, indices):
         """
@@ -357,51 +1147,96 @@ class LineList(Table):
 
         Parameters
         ----------
-        indices: [QModelIndex, ...]
-            List of QModelIndex instances to extract from.
+        indices: array of int, array of bool, or [QModelIndex, ...]
+            The row numbers to extract, a mask selecting the
+            rows to extract, or QModelIndex instances pointing
+            to them.
 
         Returns
         -------
         LineList
-            line list with subset of lines
+            line list with subset of lines, in the order
+            they appear in self.
         """
-        row_indices = []
-        for index in indices:
-            row_indices.append(index.row())
+        if len(indices) > 0 and hasattr(indices[0], 'row'):
+            indices = [index.row() for index in indices]
 
-        line_indices = []
-        for index in range(len(self.columns[0])):
-            line_indices.append(index)
+        rows = np.asarray(indices)
 
-        indices_to_remove = list(
-            filter(lambda x: x not in row_indices, line_indices)
-        )
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        else:
+            rows = np.unique(rows.astype(int))
 
-        return self._remove_lines(indices_to_remove)
+        return self._new_from_rows(rows)
 
-    def _remove_lines(self, indices_to_remove):
+    def _new_from_rows(self, rows):
         """
-        Makes a copy of self and removes
-        unwanted lines from the copy.
+        Builds a LineList instance with the lines of self
+        selected by `rows`.
 
         Parameters
         ----------
-        indices_to_remove: [int, ...]
-            List of row numbers to remove
+        rows: slice or array
+            The rows to select. Slices reference the data of
+            self, other selections copy it.
 
         Returns
         -------
         LineList:
-            A new copy of the `LineList` with the rows removed.
+            The new `LineList`, with the attributes of self.
         """
-        table = Table(self)
+        result = self[rows]
 
-        table.remove_rows(indices_to_remove)
+        result.name = self.name
+        result.tooltips = self.tooltips
+        result._table = Table(result, copy=False)
 
-        result = LineList(table, tooltips=self.tooltips, name=self.name)
+        result._parent = self
+        result._parent_rows = rows
+
+        if self.source_index is not None:
+            result.source_lists = self.source_lists
+            result.source_index = self.source_index[rows]
 
         return result
 
+    @property
+    def redshift_factor(self):
+        """
+        The (1 + z) factor by which the wavelengths of
+        the list are shifted.
+        """
+        if self.z_units == 'km/s':
+            return 1. + self.redshift / constants.c.value * 1000.
+
+        return 1. + self.redshift
+
+    def redshifted_wavelengths(self):
+        """
+        Returns the values of the wavelength column shifted
+        by the redshift of the list. Lines of a merged list
+        are shifted by the redshift of the list they come
+        from, as currently set. The table is not modified.
+
+        Returns
+        -------
+        ndarray
+            The shifted values, in the row order of the list.
+        """
+        if self.source_index is None:
+            factors = self.redshift_factor
+        else:
+            factors = np.array([linelist.redshift_factor
+                                for linelist in self.source_lists])
+            factors = factors[self.source_index]
+
+        column = self[WAVELENGTH_COLUMN]
+        values = np.asarray(column, dtype=float)
+        unit = column.unit if column.unit is not None else u.dimensionless_unscaled
+
+        return _redshifted(values, unit, factors)
+
     def setRedshift(self, redshift, z_units):
         self.redshift = redshift
         self.z_units = z_units
@@ -17,6 +17,38 @@ class DataListModel(QStandardItemModel):
     def __init__(self, *args, **kwargs):
         super(DataListModel, self).__init__(*args, **kwargs)
 
+        # Index of the top-level data items by their identifier, kept in sync
+        # with the rows of the model.
+        self._items_by_id = {}
+
+        self.rowsInserted.connect(self._on_rows_inserted)
+        self.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        self.modelReset.connect(self._rebuild_id_index)
+
+    def _on_rows_inserted(self, parent, first, last):
+        if parent.isValid():
+            return
+
+        for row in range(first, last + 1):
+            item = self.item(row)
+
+            if isinstance(item, DataItem):
+                self._items_by_id[item.identifier] = item
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if parent.isValid():
+            return
+
+        for row in range(first, last + 1):
+            item = self.item(row)
+
+            if isinstance(item, DataItem):
+                self._items_by_id.pop(item.identifier, None)
+
+    def _rebuild_id_index(self):
+        self._items_by_id = {item.identifier: item for item in self.items
+                             if isinstance(item, DataItem)}
+
     @property
     def items(self):
         """
@@ -33,6 +65,34 @@ class DataListModel(QStandardItemModel):
 
         return data_item
 
+    def add_data_many(self, specs, names, is_model=False):
+        """
+        Adds several spectra to the model at once. Listeners are notified of
+        all the new rows with a single ``rowsInserted`` signal.
+
+        Parameters
+        ----------
+        specs : list of :class:`~specutils.Spectrum1D`
+            The spectra to add.
+        names : list of str
+            The display name of each spectrum.
+        is_model : bool
+            Whether the spectra represent models.
+
+        Returns
+        -------
+        : list of :class:`~specviz.core.items.DataItem`
+            The data items added to the model, in order.
+        """
+        data_items = [DataItem(name, identifier=uuid.uuid4(), data=spec,
+                               is_model=is_model)
+                      for spec, name in zip(specs, names)]
+
+        if len(data_items) > 0:
+            self.invisibleRootItem().appendRows(data_items)
+
+        return data_items
+
     def remove_data(self, identifier):
         """
         Removes data given the data item's UUID.
@@ -47,8 +107,46 @@ class DataListModel(QStandardItemModel):
         if item is not None:
             self.removeRow(item.index().row())
 
+    def remove_data_many(self, identifiers):
+        """
+        Removes several data items given their UUIDs. Rows are removed in
+        contiguous blocks so that listeners receive one removal signal per
+        block rather than per item.
+
+        Parameters
+        ----------
+        identifiers : list of :class:`~uuid.UUID`
+            Assigned ids of the :class:`~specviz.core.items.DataItem` objects.
+        """
+        rows = sorted({item.row() for item in map(self.item_from_id,
+                                                  identifiers)
+                       if item is not None}, reverse=True)
+
+        # Group the rows into contiguous ranges, removing from the bottom of
+        # the model up so that the remaining row numbers stay valid.
+        while len(rows) > 0:
+            last = first = rows.pop(0)
+
+            while len(rows) > 0 and rows[0] == first - 1:
+                first = rows.pop(0)
+
+            self.removeRows(first, last - first + 1)
+
     def item_from_id(self, identifier):
-        return next((x for x in self.items if x.identifier == identifier))
+        """
+        Retrieves the data item with the given UUID.
+
+        Parameters
+        ----------
+        identifier : :class:`~uuid.UUID`
+            Assigned id of the :class:`~specviz.core.items.DataItem` object.
+
+        Returns
+        -------
+        : :class:`~specviz.core.items.DataItem` or None
+            The data item, or `None` if no item has that identifier.
+        """
+        return self._items_by_id.get(identifier)
 
     def data(self, index, role=Qt.DisplayRole):
         """
@@ -82,12 +180,7 @@ class DataListModel(QStandardItemModel):
         return super(DataListModel, self).setData(index, value, role)
 
     def clear(self):
-        self.beginResetModel()
-
-        for item in self.items:
-            self.removeRow(item.index().row())
-
-        self.endResetModel()
+        self.removeRows(0, self.rowCount())
 
 
 class PlotProxyModel(QSortFilterProxyModel):
@@ -113,9 +206,29 @@ class PlotProxyModel(QSortFilterProxyModel):
 
         return item
 
+    def take_item(self, index):
+        """
+        Removes the :class:`PlotDataItem` of the given index from the proxy
+        model, so that it and its arrays can be released once the data item
+        is removed from the source model.
+
+        Returns
+        -------
+        : :class:`~specviz.core.items.PlotDataItem` or None
+            The removed item, or None if no item had been created for the
+            index.
+        """
+        index = self.mapToSource(index)
+        data_item = self.sourceModel().data(index, role=Qt.UserRole)
+
+        return self._items.pop(data_item.identifier, None)
+
     def item_from_id(self, identifier):
         data_item = self.sourceModel().item_from_id(identifier)
 
+        if data_item is None:
+            return
+
         if data_item.identifier not in self._items:
             self._items[data_item.identifier] = PlotDataItem(data_item)
 
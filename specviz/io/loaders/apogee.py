@@ -10,7 +10,7 @@ import os
 from astropy.io import fits
 from astropy.table import Table
 from astropy.wcs import WCS
-from astropy.units import Unit, def_unit
+from astropy.units import Quantity, Unit, def_unit
 from astropy.nddata import StdDevUncertainty
 
 import numpy as np
@@ -22,34 +22,34 @@ __all__ = ['apVisit_identify', 'apStar_identify', 'aspcapStar_identify',
            'apVisit_loader', 'apStar_loader', 'aspcapStar_loader']
 
 
-def apVisit_identify(*args, **kwargs):
+def apVisit_identify(origin, *args, **kwargs):
     """
     Check whether given filename is FITS. This is used for Astropy I/O
     Registry.
     """
     return (isinstance(args[0], str) and
             args[0].lower().split('.')[-1] == 'fits' and
-            args[0].startswith('apVisit'))
+            os.path.basename(args[0]).startswith('apVisit'))
 
 
-def apStar_identify(*args, **kwargs):
+def apStar_identify(origin, *args, **kwargs):
     """
     Check whether given filename is FITS. This is used for Astropy I/O
     Registry.
     """
     return (isinstance(args[0], str) and
             args[0].lower().split('.')[-1] == 'fits' and
-            args[0].startswith('apStar'))
+            os.path.basename(args[0]).startswith('apStar'))
 
 
-def aspcapStar_identify(*args, **kwargs):
+def aspcapStar_identify(origin, *args, **kwargs):
     """
     Check whether given filename is FITS. This is used for Astropy I/O
     Registry.
     """
     return (isinstance(args[0], str) and
             args[0].lower().split('.')[-1] == 'fits' and
-            args[0].startswith('aspcapStar'))
+            os.path.basename(args[0]).startswith('aspcapStar'))
 
 
 @data_loader(label="APOGEE apVisit", identifier=apVisit_identify)
@@ -68,33 +68,33 @@ def apVisit_loader(file_name, **kwargs):
         The data.
     """
     name = os.path.basename(file_name.rstrip(os.sep)).rsplit('.', 1)[0]
+
+    # Keep the file memory mapped; the chip rows below are flattened as
+    # views rather than concatenated into new arrays.
+    kwargs.setdefault('memmap', True)
     hdulist = fits.open(file_name, **kwargs)
 
     header = hdulist[0].header
     meta = {'header': header}
 
     # spectrum is stored in three rows (for three chips)
-    data = np.concatenate([hdulist[1].data[0, :],
-                           hdulist[1].data[1, :],
-                           hdulist[1].data[2, :]])
+    data = hdulist[1].data[:3].reshape(-1)
     unit = Unit('1e-17 erg / (Angstrom cm2 s)')
 
-    stdev = np.concatenate([hdulist[2].data[0, :],
-                           hdulist[2].data[1, :],
-                           hdulist[2].data[2, :]])
-    uncertainty = StdDevUncertainty(stdev * unit)
+    stdev = hdulist[2].data[:3].reshape(-1)
+    uncertainty = StdDevUncertainty(Quantity(stdev, unit, copy=False),
+                                    copy=False)
 
     # Dispersion is not a simple function in these files.  There's a
     # look-up table instead.
-    dispersion = np.concatenate([hdulist[4].data[0, :],
-                                 hdulist[4].data[1, :],
-                                 hdulist[4].data[2, :]])
+    dispersion = hdulist[4].data[:3].reshape(-1)
     dispersion_unit = Unit('Angstrom')
     hdulist.close()
 
-    return Spectrum1D(data=data * unit,
+    return Spectrum1D(data=Quantity(data, unit, copy=False),
                       uncertainty=uncertainty,
-                      dispersion=dispersion * dispersion_unit,
+                      dispersion=Quantity(dispersion, dispersion_unit,
+                                          copy=False),
                       meta=meta)
 
 
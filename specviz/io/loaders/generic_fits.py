@@ -12,16 +12,45 @@ from astropy.nddata import StdDevUncertainty
 from specutils.io.registers import data_loader, custom_writer
 from specutils import Spectrum1D
 
+from .apogee import apVisit_identify, apStar_identify, aspcapStar_identify
+from .header_cache import get_header
+from .hst_cos import cos_identify
+from .hst_stis import stis_identify
+from .sdss import spec_identify, spSpec_identify
+
 __all__ = ['simple_generic_loader', 'simple_generic_writer']
 
+# Files recognised by these identifiers are read by the corresponding
+# instrument loaders. The generic loader is only a fallback for them, so
+# that auto-identification never finds two matching formats.
+SPECIFIC_IDENTIFIERS = (apVisit_identify, apStar_identify,
+                        aspcapStar_identify, cos_identify, stis_identify,
+                        spec_identify, spSpec_identify)
+
 
-def fits_identify(*args, **kwargs):
+def fits_identify(origin, *args, **kwargs):
     """
-    Check whether given filename is FITS. This is used for Astropy I/O
-    Registry.
+    Check whether given file is FITS with the 'flux' and 'err' table columns
+    the generic loader reads, and is not recognised by any of the instrument
+    specific loaders. This is used for Astropy I/O Registry.
     """
-    return (isinstance(args[0], str) and
-            args[0].lower().split('.')[-1] in ['fits', 'fit', 'fits.gz'])
+    if not (isinstance(args[0], str) and
+            args[0].lower().endswith(('.fits', '.fit', '.fits.gz'))):
+        return False
+
+    if any(identify(origin, *args, **kwargs)
+           for identify in SPECIFIC_IDENTIFIERS):
+        return False
+
+    # The loader reads the first extension as a table
+    header = get_header(args[0], 1)
+    if header is None or header.get('XTENSION') != 'BINTABLE':
+        return False
+
+    columns = {header.get('TTYPE{}'.format(i + 1), '').lower()
+               for i in range(header.get('TFIELDS', 0))}
+
+    return {'flux', 'err'} <= columns
 
 
 @custom_writer("Generic FITS")
@@ -0,0 +1,82 @@
+"""
+Header cache shared by the loader identifiers.
+
+The astropy io registry calls every registered identifier when
+auto-detecting the format of a file. Identifiers that need to look at the
+headers of a file go through `get_primary_header` or `get_header` so that
+each header is only read once per file, however many identifiers inspect
+it.
+"""
+import os
+from functools import lru_cache
+
+from astropy.io import fits
+
+__all__ = ['get_header', 'get_primary_header']
+
+# Errors raised when what is given is not a readable FITS file, or does not
+# have the requested extension.
+_READ_ERRORS = (OSError, ValueError, IndexError, KeyError, TypeError)
+
+
+@lru_cache(maxsize=256)
+def _read_header(path, extension, mtime, size):
+    # The modification time and size are only part of the cache key so that
+    # a file changed on disk is read again.
+    try:
+        return fits.getheader(path, extension)
+    except _READ_ERRORS:
+        return None
+
+
+def get_header(path, extension):
+    """
+    Retrieves a header of a FITS file, reading it from disk only the first
+    time it is requested.
+
+    Parameters
+    ----------
+    path : str or file-like
+        The path to the FITS file. File-like objects are read every time.
+    extension : int or str
+        The index or name of the extension.
+
+    Returns
+    -------
+    : :class:`~astropy.io.fits.Header` or None
+        The header, or `None` if the file is not a readable FITS file or has
+        no such extension. The header is shared between callers and must not
+        be modified.
+    """
+    if not isinstance(path, str):
+        try:
+            return fits.getheader(path, extension)
+        except _READ_ERRORS:
+            return None
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return _read_header(os.path.abspath(path), extension, stat.st_mtime,
+                        stat.st_size)
+
+
+def get_primary_header(path):
+    """
+    Retrieves the primary header of a FITS file, reading it from disk only
+    the first time it is requested.
+
+    Parameters
+    ----------
+    path : str or file-like
+        The path to the FITS file. File-like objects are read every time.
+
+    Returns
+    -------
+    : :class:`~astropy.io.fits.Header` or None
+        The primary header, or `None` if the file is not a readable FITS
+        file. The header is shared between callers and must not be modified.
+    """
+    return get_header(path, 0)
@@ -1,22 +1,25 @@
 import os
 
 from astropy.io import fits
-from astropy.units import Unit
+from astropy.units import Quantity, Unit
 from astropy.nddata import StdDevUncertainty
 
 from specutils.io.registers import data_loader
 from specutils import Spectrum1D
 
+from .header_cache import get_primary_header
+from .views import flatten_sorted
+
 __all__ = ['cos_identify', 'cos_spectrum_loader']
 
 
-def cos_identify(*args, **kwargs):
+def cos_identify(origin, *args, **kwargs):
     """Check whether given file contains HST/COS spectral data."""
-    with fits.open(args[0]) as hdu:
-        if hdu[0].header['TELESCOP'] == 'HST' and hdu[0].header['INSTRUME'] == 'COS':
-           return True
+    header = get_primary_header(args[0])
 
-    return False
+    return (header is not None and
+            header.get('TELESCOP') == 'HST' and
+            header.get('INSTRUME') == 'COS')
 
 
 @data_loader(label="HST/COS", identifier=cos_identify)
@@ -37,20 +40,24 @@ def cos_spectrum_loader(file_name, **kwargs):
 
     name = os.path.basename(file_name)
 
+    # Keep the file memory mapped; the table columns below are copied once
+    # when they are flattened, and again only if they have to be sorted.
+    kwargs.setdefault('memmap', True)
+
     with fits.open(file_name, **kwargs) as hdu:
         header = hdu[0].header
         meta = {'header': header}
 
         unit = Unit("erg/cm**2 Angstrom s")
         disp_unit = Unit('Angstrom')
-        data = hdu[1].data['FLUX'].flatten() * unit
-        dispersion = hdu[1].data['wavelength'].flatten() * disp_unit
-        uncertainty = StdDevUncertainty(hdu[1].data["ERROR"].flatten() * unit)
-
-        sort_idx = dispersion.argsort()
-        dispersion = dispersion[sort_idx]
-        data = data[sort_idx]
-        uncertainty = uncertainty[sort_idx]
+        dispersion, data, error = flatten_sorted(hdu[1].data['wavelength'],
+                                                 hdu[1].data['FLUX'],
+                                                 hdu[1].data['ERROR'])
+
+        data = Quantity(data, unit, copy=False)
+        dispersion = Quantity(dispersion, disp_unit, copy=False)
+        uncertainty = StdDevUncertainty(Quantity(error, unit, copy=False),
+                                        copy=False)
 
     return Spectrum1D(flux=data,
                       spectral_axis=dispersion,
@@ -9,7 +9,7 @@ import re
 from astropy.io import fits
 from astropy.table import Table
 from astropy.wcs import WCS
-from astropy.units import Unit, def_unit
+from astropy.units import Quantity, Unit, def_unit
 from astropy.nddata import StdDevUncertainty
 
 import numpy as np
@@ -17,6 +17,8 @@ import numpy as np
 from specutils.io.registers import data_loader, custom_writer
 from specutils import Spectrum1D
 
+from .views import stddev_from_ivar
+
 __all__ = ['spec_identify', 'spSpec_identify',
            'spec_loader', 'spSpec_loader']
 
@@ -24,22 +26,22 @@ _spSpec_pattern = re.compile(r'spSpec-\d{5}-\d{4}-\d{3}\.fit')
 _spec_pattern = re.compile(r'spec-\d{4,5}-\d{5}-\d{4}\.fits')
 
 
-def spec_identify(*args, **kwargs):
+def spec_identify(origin, *args, **kwargs):
     """
     Check whether given filename is FITS. This is used for Astropy I/O
     Registry.
     """
     return (isinstance(args[0], str) and
-            _spec_pattern.match(args[0]) is not None)
+            _spec_pattern.match(os.path.basename(args[0])) is not None)
 
 
-def spSpec_identify(*args, **kwargs):
+def spSpec_identify(origin, *args, **kwargs):
     """
     Check whether given filename is FITS. This is used for Astropy I/O
     Registry.
     """
     return (isinstance(args[0], str) and
-            _spSpec_pattern.match(args[0]) is not None)
+            _spSpec_pattern.match(os.path.basename(args[0])) is not None)
 
 
 @data_loader(label="SDSS-III/IV spec", identifier=spec_identify)
@@ -58,6 +60,9 @@ def spec_loader(file_name, **kwargs):
         The data.
     """
     name = os.path.basename(file_name.rstrip(os.sep)).rsplit('.', 1)[0]
+
+    # Keep the file memory mapped so that the flux is not copied
+    kwargs.setdefault('memmap', True)
     hdulist = fits.open(file_name, **kwargs)
 
     header = hdulist[0].header
@@ -68,8 +73,9 @@ def spec_loader(file_name, **kwargs):
     unit = Unit('1e-17 erg / (Angstrom cm2 s)')
 
     # Because there is no object that explicitly supports inverse variance.
-    stdev = np.sqrt(1.0/hdulist[1].data['ivar'])
-    uncertainty = StdDevUncertainty(stdev * unit)
+    stdev = stddev_from_ivar(hdulist[1].data['ivar'])
+    uncertainty = StdDevUncertainty(Quantity(stdev, unit, copy=False),
+                                    copy=False)
 
     dispersion = 10**hdulist[1].data['loglam']
     dispersion_unit = Unit('Angstrom')
@@ -77,7 +83,7 @@ def spec_loader(file_name, **kwargs):
     mask = hdulist[1].data['and_mask'] != 0
     hdulist.close()
 
-    return Spectrum1D(flux=data * unit,
+    return Spectrum1D(flux=Quantity(data, unit, copy=False),
                       spectral_axis=dispersion * dispersion_unit,
                       uncertainty=uncertainty,
                       meta=meta,
@@ -0,0 +1,68 @@
+"""
+Helpers keeping the number of copies loaders make of FITS data to a minimum.
+"""
+import numpy as np
+
+__all__ = ['flatten_sorted', 'stddev_from_ivar']
+
+
+def flatten_sorted(dispersion, *arrays):
+    """
+    Flattens multi-row spectral arrays (e.g. detector segments or echelle
+    orders) into one dimensional arrays sorted by dispersion.
+
+    Each array is copied once into a contiguous one dimensional array; the
+    columns of binary tables are strided views into the table records, so
+    they can not be flattened without that copy. A second copy is only made
+    when the flattened values are not already sorted by dispersion.
+
+    Parameters
+    ----------
+    dispersion : :class:`~numpy.ndarray`
+        The dispersion values, one row per segment.
+    arrays : :class:`~numpy.ndarray`
+        Arrays of the same shape as `dispersion` to flatten alongside it.
+
+    Returns
+    -------
+    : list of :class:`~numpy.ndarray`
+        The flattened dispersion followed by the flattened `arrays`.
+    """
+    rows = np.atleast_2d(dispersion)
+    order = np.argsort(rows[:, 0], kind='mergesort')
+
+    # Leave the rows untouched if they are already in order
+    if np.array_equal(order, np.arange(order.size)):
+        order = slice(None)
+
+    flat = [np.atleast_2d(x)[order].reshape(-1)
+            for x in (dispersion,) + arrays]
+
+    if np.all(np.diff(flat[0]) >= 0):
+        return flat
+
+    sort_idx = np.argsort(flat[0], kind='mergesort')
+
+    return [x[sort_idx] for x in flat]
+
+
+def stddev_from_ivar(ivar):
+    """
+    Standard deviations computed from inverse variances.
+
+    The result is built in a single new array, without the temporary array
+    that ``np.sqrt(1.0 / ivar)`` creates.
+
+    Parameters
+    ----------
+    ivar : :class:`~numpy.ndarray`
+        The inverse variance values.
+
+    Returns
+    -------
+    : :class:`~numpy.ndarray`
+        The standard deviation values.
+    """
+    stddev = np.reciprocal(ivar, dtype=float)
+
+    return np.sqrt(stddev, out=stddev)
@@ -5,10 +5,24 @@ from ...core.items import DataItem
 
 class ModelDataItem(DataItem):
     def __init__(self, model, *args, **kwargs):
-        self._model_editor_model = model
+        self._model_editor_model = None
 
         super().__init__(*args, **kwargs)
 
+        self.model_editor_model = model
+
+    def _on_model_changed(self, *args):
+        # The flux is evaluated from the model, so any change to the model
+        # is a change of the data.
+        self.invalidate()
+
+    @property
+    def data_version(self):
+        # Editing the equation doesn't emit any model signal.
+        equation = getattr(self.model_editor_model, 'equation', None)
+
+        return (super().data_version, equation)
+
     @property
     def flux(self):
         if self.model_editor_model is None:
@@ -27,4 +41,18 @@ class ModelDataItem(DataItem):
 
     @model_editor_model.setter
     def model_editor_model(self, value):
-        self._model_editor_model = value
\ No newline at end of file
+        if self._model_editor_model is not None:
+            for signal in _change_signals(self._model_editor_model):
+                signal.disconnect(self._on_model_changed)
+
+        if value is not None:
+            for signal in _change_signals(value):
+                signal.connect(self._on_model_changed)
+
+        self._model_editor_model = value
+        self.invalidate()
+
+
+def _change_signals(model):
+    return (model.dataChanged, model.rowsInserted, model.rowsRemoved,
+            model.modelReset)
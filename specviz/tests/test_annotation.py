@@ -0,0 +1,132 @@
+import numpy as np
+import pyqtgraph as pg
+from qtpy.QtCore import QPointF
+
+from ..core import annotation
+from ..core.annotation import LineIDMarkerLayer
+
+
+def make_plot(qtbot, layer):
+    plot_widget = pg.PlotWidget()
+    qtbot.addWidget(plot_widget)
+    plot_widget.resize(600, 400)
+    plot_widget.addItem(layer)
+    plot_widget.setRange(xRange=(0, 100), yRange=(0, 1), padding=0)
+    plot_widget.show()
+    qtbot.waitExposed(plot_widget)
+
+    return plot_widget
+
+
+def label_point(layer, x, y, pixels_up=5):
+    # A point on the label of the marker at (x, y), a few pixels above it.
+    return QPointF(x, y + pixels_up * abs(layer.pixelHeight()))
+
+
+def test_marker_at(qtbot):
+    layer = LineIDMarkerLayer()
+    plot_widget = make_plot(qtbot, layer)  # noqa: keeps the layer alive
+
+    # An empty layer has no markers to find
+    assert layer.marker_at(QPointF(10, 0.5)) is None
+
+    pixel_width = abs(layer.pixelWidth())
+    x = np.array([50, 10, 10 + 4 * pixel_width])
+    layer.set_markers(x, [0.5, 0.5, 0.5], ['C', 'A', 'B'],
+                      ['red', 'blue', 'blue'], rows=[7, 8, 9])
+
+    assert layer.marker_at(label_point(layer, 50, 0.5)) == 7
+
+    # Where labels overlap, the marker closest in X wins
+    assert layer.marker_at(label_point(layer, 10, 0.5)) == 8
+    assert layer.marker_at(label_point(layer, x[2] + pixel_width, 0.5)) == 9
+
+    # Away from the labels, there is no marker
+    assert layer.marker_at(QPointF(30, 0.5)) is None
+    assert layer.marker_at(QPointF(50, 0.9)) is None
+
+
+def test_marker_at_without_view():
+    # Without a view, the pixel size is not known
+    layer = LineIDMarkerLayer()
+    layer.set_markers([10], [0.5], ['A'], [None])
+
+    assert layer.pixelWidth() == 0
+    assert layer.marker_at(QPointF(10, 0.5)) is None
+
+
+def test_set_positions(qtbot):
+    layer = LineIDMarkerLayer()
+    plot_widget = make_plot(qtbot, layer)  # noqa: keeps the layer alive
+
+    layer.set_markers([10, 20, 30], [0.5, 0.5, 0.5], ['A', 'B', 'C'],
+                      [None] * 3, rows=[0, 1, 2])
+
+    # Moved markers are found at their new positions, in their new order
+    layer.set_positions([60, 40, 20])
+
+    assert list(layer._sorted_x) == [20, 40, 60]
+    assert layer.marker_at(label_point(layer, 60, 0.5)) == 0
+    assert layer.marker_at(label_point(layer, 20, 0.5)) == 2
+    assert layer.marker_at(label_point(layer, 10, 0.5)) is None
+
+    # The Y positions are kept unless given
+    assert list(layer._y) == [0.5, 0.5, 0.5]
+    layer.set_positions([60, 40, 20], [0.2, 0.2, 0.2])
+    assert layer.marker_at(label_point(layer, 40, 0.2)) == 1
+
+
+class HoverEvent(object):
+    def __init__(self, pos, exit=False):
+        self._pos = pos
+        self._exit = exit
+
+    def pos(self):
+        return self._pos
+
+    def isExit(self):
+        return self._exit
+
+
+def test_hover_tooltip(qtbot):
+    requested = []
+
+    def tooltip_provider(row):
+        requested.append(row)
+        return 'row {}'.format(row)
+
+    layer = LineIDMarkerLayer(tooltip_provider=tooltip_provider)
+    plot_widget = make_plot(qtbot, layer)  # noqa: keeps the layer alive
+    layer.set_markers([10, 50], [0.5, 0.5], ['A', 'B'], [None] * 2,
+                      rows=[3, 4])
+
+    layer.hoverEvent(HoverEvent(label_point(layer, 50, 0.5)))
+    assert requested == [4]
+    assert layer.toolTip() == 'row 4'
+
+    # Tool tips are only built for markers under the mouse
+    layer.hoverEvent(HoverEvent(QPointF(30, 0.5)))
+    assert requested == [4]
+    assert layer.toolTip() == ''
+
+    layer.hoverEvent(HoverEvent(label_point(layer, 10, 0.5), exit=True))
+    assert requested == [4]
+    assert layer.toolTip() == ''
+
+
+def test_label_cache_is_lru(monkeypatch):
+    monkeypatch.setattr(annotation, 'LABEL_CACHE_SIZE', 2)
+
+    layer = LineIDMarkerLayer()
+    layer.set_markers([1, 2, 3], [0, 0, 0], ['A', 'B', 'C'], [None] * 3)
+
+    a = layer._label_pixmap(0)
+    layer._label_pixmap(1)
+
+    # Using a label keeps it in the cache; the least recently used goes
+    assert layer._label_pixmap(0) is a
+    layer._label_pixmap(2)
+
+    assert len(layer._pixmaps) == 2
+    assert layer._label_pixmap(0) is a
+    assert [key[0] for key in layer._pixmaps] == ['C', 'A']
@@ -0,0 +1,120 @@
+import os
+
+import astropy.units as u
+import numpy as np
+from astropy.table import Table
+
+from ..core.data_loader import DataLoader, expand_file_paths
+# Registers the specviz readers
+from ..io import loaders  # noqa
+
+
+def test_expand_file_paths(tmpdir):
+    for name in ('b.fits', 'a.fits', 'c.txt'):
+        tmpdir.join(name).write('')
+    tmpdir.mkdir('sub')
+
+    directory = str(tmpdir)
+    missing = os.path.join(directory, 'missing.fits')
+
+    # Directories expand to their files, sorted, without sub-directories
+    assert expand_file_paths([directory]) == [
+        os.path.join(directory, x) for x in ('a.fits', 'b.fits', 'c.txt')]
+
+    # Glob patterns expand to the files they match, plain paths are kept
+    assert expand_file_paths([os.path.join(directory, '*.fits'), missing]) == [
+        os.path.join(directory, x) for x in ('a.fits', 'b.fits')] + [missing]
+
+
+def test_cancel(qtbot, tmpdir):
+    loader = DataLoader()
+    received = []
+    loader.loaded.connect(lambda *args: received.append(args))
+    loader.failed.connect(lambda *args: received.append(args))
+
+    with qtbot.waitSignal(loader.finished):
+        loader.load([str(tmpdir.join('missing{}.fits'.format(i)))
+                     for i in range(20)])
+        assert loader.is_loading
+
+        loader.cancel()
+        del received[:]
+
+    assert not loader.is_loading
+
+    # Files that were being read when cancelled are not reported
+    qtbot.wait(200)
+    assert received == []
+
+    loader.shutdown()
+
+
+def test_load_failure(qtbot, tmpdir):
+    loader = DataLoader()
+
+    with qtbot.waitSignal(loader.failed) as blocker:
+        loader.load([str(tmpdir.join('missing.fits'))])
+
+    assert blocker.args[0] == str(tmpdir.join('missing.fits'))
+
+    loader.shutdown()
+
+
+def test_load_directory(qtbot, tmpdir):
+    for i in range(3):
+        table = Table([np.linspace(4000, 5000, 10) * u.AA,
+                       np.full(10, i) * u.Jy],
+                      names=['Wavelength', 'Intensity'])
+        table.write(str(tmpdir.join('spec{}.ecsv'.format(i))),
+                    format='ascii.ecsv')
+    tmpdir.join('README').write('Spectra of the night')
+
+    file_paths = expand_file_paths([str(tmpdir)])
+    assert [os.path.basename(x) for x in file_paths] == [
+        'README', 'spec0.ecsv', 'spec1.ecsv', 'spec2.ecsv']
+
+    loader = DataLoader()
+    failures = []
+    loader.failed.connect(lambda *args: failures.append(args))
+
+    with qtbot.waitSignal(loader.batch_loaded, timeout=60000) as blocker:
+        loader.load(file_paths, batch=True)
+
+    # Files no reader recognises are reported, the others are loaded
+    specs, loaded_paths = blocker.args
+    assert [x[0] for x in failures] == [str(tmpdir.join('README'))]
+    assert loaded_paths == file_paths[1:]
+    assert [spec.flux[0].value for spec in specs] == [0, 1, 2]
+
+    loader.shutdown()
+
+
+def test_batch_uses_runtime_readers(qtbot, tmpdir):
+    from astropy.io import registry as io_registry
+    from specutils import Spectrum1D
+
+    # Readers registered at run time, e.g. by plugins, are used for batches
+    def reader(file_path, **kwargs):
+        return Spectrum1D(flux=np.full(10, float(open(file_path).read())) * u.Jy,
+                          spectral_axis=np.linspace(4000, 5000, 10) * u.AA)
+
+    io_registry.register_reader('specviz-test', Spectrum1D, reader)
+
+    try:
+        file_paths = []
+        for i in range(3):
+            tmpdir.join('spec{}.txt'.format(i)).write(str(i))
+            file_paths.append(str(tmpdir.join('spec{}.txt'.format(i))))
+
+        loader = DataLoader()
+
+        with qtbot.waitSignal(loader.batch_loaded) as blocker:
+            loader.load(file_paths, file_loader='specviz-test', batch=True)
+
+        specs, loaded_paths = blocker.args
+        assert loaded_paths == file_paths
+        assert [spec.flux[0].value for spec in specs] == [0, 1, 2]
+
+        loader.shutdown()
+    finally:
+        io_registry.unregister_reader('specviz-test', Spectrum1D)
@@ -0,0 +1,112 @@
+import astropy.units as u
+import numpy as np
+from specutils import Spectrum1D
+
+from ..core.items import DataItem, LevelOfDetail, PlotDataItem
+
+
+def test_level_of_detail_preserves_extrema():
+    x = np.linspace(1000, 2000, 100001)
+    y = np.zeros(x.size)
+    y[50000] = 10
+    y[70001] = -5
+
+    lod = LevelOfDetail(x, y)
+    level, first, last = lod.window(1000, 2000, 500)
+    edges, values = lod.arrays(level, first, last)
+
+    assert level > 0
+    assert edges.size == values.size + 1
+    assert values.size < x.size / 10
+    assert values.max() == 10
+    assert values.min() == -5
+    assert lod.bounds(0) == (1000, 2000)
+    assert lod.bounds(1) == (-5, 10)
+
+
+def test_level_of_detail_full_resolution_when_zoomed():
+    x = np.linspace(1000, 2000, 100001)[::-1]
+    y = np.arange(x.size, dtype=float)
+
+    lod = LevelOfDetail(x, y)
+    level, first, last = lod.window(1500, 1500.5, 1000)
+    edges, values = lod.arrays(level, first, last)
+
+    assert level == 0
+    assert np.all(np.diff(edges) >= 0)
+    assert edges[0] <= 1500 and edges[-1] >= 1500.5
+
+
+def test_plot_data_item_conversion_cache(qtbot):
+    spec = Spectrum1D(flux=np.arange(1, 11) * u.Jy,
+                      spectral_axis=np.linspace(4000, 5000, 10) * u.AA)
+    data_item = DataItem("spectrum", "spectrum", spec)
+    plot_data_item = PlotDataItem(data_item)
+
+    flux = plot_data_item.flux
+    spectral_axis = plot_data_item.spectral_axis
+
+    # Setting the current units again neither converts nor re-draws
+    with qtbot.assertNotEmitted(plot_data_item.data_unit_changed):
+        plot_data_item.data_unit = plot_data_item.data_unit
+    plot_data_item.spectral_axis_unit = plot_data_item.spectral_axis_unit
+    plot_data_item.set_data()
+
+    assert plot_data_item.flux is flux
+    assert plot_data_item.spectral_axis is spectral_axis
+
+    # Unit changes convert once
+    plot_data_item.spectral_axis_unit = "nm"
+    spectral_axis = plot_data_item.spectral_axis
+    assert plot_data_item.spectral_axis is spectral_axis
+    np.testing.assert_allclose(spectral_axis, np.linspace(400, 500, 10))
+
+    # Data changes discard the converted arrays
+    data_item.invalidate()
+    assert plot_data_item.spectral_axis is not spectral_axis
+
+
+def test_error_bars_follow_level_of_detail(qtbot):
+    from astropy.nddata import StdDevUncertainty
+
+    size = 200001
+    spec = Spectrum1D(flux=np.ones(size) * u.Jy,
+                      spectral_axis=np.linspace(5000, 4000, size) * u.AA,
+                      uncertainty=StdDevUncertainty(np.arange(size) * 0.1))
+    plot_data_item = PlotDataItem(DataItem("spectrum", "spectrum", spec))
+
+    # Error bars are hidden while a decimated version is drawn
+    assert plot_data_item.level_of_detail is not None
+    assert len(plot_data_item.error_bar_item.opts['x']) == 0
+
+    # At full resolution, only the samples in view get error bars
+    lod = plot_data_item.level_of_detail
+    window = lod.window(4500, 4500.1, 1000)
+    plot_data_item._lod_window = window
+    plot_data_item._update_error_bars()
+
+    opts = plot_data_item.error_bar_item.opts
+    indices = lod.source_slice(*window[1:])
+    assert 0 < len(opts['x']) < 100
+    np.testing.assert_allclose(opts['height'], spec.uncertainty.array[indices])
+    assert np.all(np.abs(opts['x'] - 4500.05) < 0.1)
+
+
+def test_data_bounds_follow_level_of_detail(qtbot):
+    size = 200001
+    flux = np.zeros(size)
+    flux[1234] = 10
+    spec = Spectrum1D(flux=flux * u.Jy,
+                      spectral_axis=np.linspace(4000, 5000, size) * u.AA)
+    plot_data_item = PlotDataItem(DataItem("spectrum", "spectrum", spec))
+
+    # The full extent is reported while only part of the data is drawn
+    lod = plot_data_item.level_of_detail
+    plot_data_item._lod_window = lod.window(4500, 4500.1, 1000)
+    plot_data_item.setData(*lod.arrays(*plot_data_item._lod_window))
+
+    assert tuple(plot_data_item.dataBounds(0)) == (4000, 5000)
+    assert tuple(plot_data_item.dataBounds(1)) == (0, 10)
+
+    # Percentiles are computed by pyqtgraph from the drawn data
+    assert tuple(plot_data_item.dataBounds(1, frac=0.99)) == (0, 0)
@@ -0,0 +1,85 @@
+import astropy.units as u
+import numpy as np
+import pyqtgraph as pg
+from astropy.table import Table
+from qtpy.QtCore import QObject, Signal
+
+from ..core.linelist import LineList
+from ..widgets.line_labels_plotter import LabelDeclutterIndex, LineLabelsPlotter
+
+
+def test_declutter_one_label_per_bucket():
+    x = np.array([9.5, 1.0, 1.2, 5.0, 5.1, 5.2, 20.0])
+    priority = np.array([0., 1., 3., 2., 7., 7., 9.])
+
+    index = LabelDeclutterIndex(x, priority)
+
+    # buckets are 1 unit wide; the label at 20 is out of view.
+    assert list(index.visible(0, 10, 10)) == [0, 2, 4]
+
+    # without priorities, the shortest wavelength wins.
+    index = LabelDeclutterIndex(x)
+    assert list(index.visible(0, 10, 10)) == [0, 1, 3]
+    assert list(index.visible(30, 40, 10)) == []
+
+
+class FakePlotWidget(QObject):
+    # The parts of PlotWidget used by the line labels plotter.
+    dismiss_linelists_window = Signal(bool)
+    erase_linelabels = Signal(object)
+
+    def __init__(self, plot_item):
+        super(FakePlotWidget, self).__init__()
+
+        self.linelist_window = None
+        self.linelists = []
+        self._plot_item = plot_item
+        self._is_selected = True
+
+
+def test_zoom_events_are_coalesced(qtbot):
+    plot_widget = pg.PlotWidget()
+    qtbot.addWidget(plot_widget)
+    plot_widget.resize(600, 400)
+    plot_widget.show()
+
+    plot_item = plot_widget.getPlotItem()
+    plotter = LineLabelsPlotter(FakePlotWidget(plot_item))
+
+    wavelengths = np.linspace(1000, 2000, 1001)
+    line_list = LineList(Table([wavelengths, ['X'] * len(wavelengths)],
+                               names=['Wavelength', 'Species']))
+    line_list['Wavelength'].unit = u.AA
+    merged = LineList.merge([line_list], u.AA)
+
+    plot_item.setRange(xRange=(1000, 2000), yRange=(0, 1), padding=0)
+    plotter._go_plot_markers(merged)
+    plotter._merged_linelist = merged
+
+    redraws = []
+    set_markers = plotter._marker_layer.set_markers
+
+    def recording_set_markers(x, y, *args, **kwargs):
+        redraws.append((np.array(x), np.array(y), kwargs['rows']))
+        set_markers(x, y, *args, **kwargs)
+
+    plotter._marker_layer.set_markers = recording_set_markers
+
+    # A burst of range changes leads to a single re-layout, for the view
+    # range at the end of the burst
+    for x_max in (1900, 1800, 1500, 1100):
+        plot_item.setRange(xRange=(1000, x_max), padding=0)
+        plotter.process_zoom_signal()
+
+    qtbot.waitUntil(lambda: len(redraws) > 0)
+    qtbot.wait(100)
+    assert len(redraws) == 1
+
+    # Only the lines in view are drawn, with a height each
+    x, y, rows = redraws[0]
+    x_min, x_max = plot_item.viewRange()[0]
+    assert len(rows) > 0
+    assert np.array_equal(rows, plotter._visible_rows)
+    assert np.all((x >= x_min) & (x <= x_max))
+    assert len(y) == len(rows)
+    np.testing.assert_allclose(y, merged.source_lists[0].height, rtol=1e-6)
@@ -0,0 +1,265 @@
+import os
+
+import numpy as np
+import pytest
+import yaml
+from astropy import units as u
+
+from ..core import linelist
+from ..utils import DATA_PATH
+
+LINELISTS_PATH = os.path.join(DATA_PATH, 'linelists')
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    """
+    Keep the pre-parsed line lists and the line list caches of each test
+    separate from the user's and from the other tests.
+    """
+    monkeypatch.setattr(linelist, 'LINELISTS_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(linelist, '_linelists_cache', [])
+    monkeypatch.setattr(linelist, '_search_index', None)
+
+    return str(tmpdir)
+
+
+def read_bundled_list(name):
+    yaml_filename = os.path.join(LINELISTS_PATH, name + '.yaml')
+
+    with open(yaml_filename, 'r') as yaml_file:
+        yaml_object = yaml.safe_load(yaml_file)
+
+    return linelist.LineList.read_list(
+        os.path.join(LINELISTS_PATH, yaml_object['filename']), yaml_object)
+
+
+def test_preparsed_cache(cache_dir):
+    parsed = read_bundled_list('SDSS')
+    assert len(os.listdir(cache_dir)) == 1
+
+    cached = read_bundled_list('SDSS')
+
+    assert cached.colnames == parsed.colnames
+    assert cached.meta['comments'] == parsed.meta['comments']
+    assert cached['Wavelength'].unit == parsed['Wavelength'].unit
+
+    for name in parsed.colnames:
+        assert list(cached[name]) == list(parsed[name])
+
+
+def test_lazy_descriptors(cache_dir):
+    read_bundled_list('SDSS')
+    linelist.populate_linelists_cache()
+
+    descriptors = {x.name: x for x in linelist._linelists_cache}
+    sdss = descriptors['SDSS']
+
+    # The summary of a pre-parsed list is known without loading it
+    assert not sdss.is_loaded
+    assert sdss.nlines > 0
+    assert len(linelist.descriptions()) == len(descriptors)
+    assert not sdss.is_loaded
+
+    assert len(sdss.linelist) == sdss.nlines
+    assert sdss.linelist.wmin == sdss.wmin
+    assert sdss.units == sdss.linelist['Wavelength'].unit
+
+
+def test_extract_range(cache_dir):
+    line_list = read_bundled_list('Reader-Corliss')
+    wavelengths = np.asarray(line_list['Wavelength'])
+
+    extracted = line_list.extract_range((0.4 * u.micron, 0.5 * u.micron))
+    expected = (wavelengths >= 4000) & (wavelengths <= 5000)
+
+    assert extracted.name == line_list.name
+    assert list(extracted['Wavelength']) == list(wavelengths[expected])
+    assert np.shares_memory(np.asarray(extracted['Wavelength']), wavelengths)
+
+    with pytest.raises(u.UnitConversionError):
+        line_list.extract_range((1 * u.s, 2 * u.s))
+
+
+def test_extract_rows(cache_dir):
+    line_list = read_bundled_list('SDSS')
+    wavelengths = list(line_list['Wavelength'])
+
+    extracted = line_list.extract_rows(np.array([5, 2, 7, 2]))
+    assert list(extracted['Wavelength']) == [wavelengths[x] for x in (2, 5, 7)]
+
+    mask = np.zeros(len(line_list), dtype=bool)
+    mask[[2, 5, 7]] = True
+    assert list(line_list.extract_rows(mask)['Wavelength']) == \
+        list(extracted['Wavelength'])
+
+    assert len(line_list.extract_rows([])) == 0
+
+
+def test_merge(cache_dir):
+    sdss = read_bundled_list('SDSS')
+    infrared = read_bundled_list('Atomic-Ionic')
+    infrared_wavelengths = np.array(infrared['Wavelength'])
+    infrared_colnames = list(infrared.colnames)
+
+    merged = linelist.LineList.merge([sdss, infrared], u.AA)
+
+    assert len(merged) == len(sdss) + len(infrared)
+    assert merged['Wavelength'].unit == u.AA
+    assert np.all(np.diff(merged['Wavelength']) >= 0)
+    assert set(sdss['Species']) <= set(merged['Species'])
+
+    # the input lists are left untouched
+    assert infrared['Wavelength'].unit == u.micron
+    assert list(infrared.colnames) == infrared_colnames
+    assert np.array_equal(infrared['Wavelength'], infrared_wavelengths)
+
+
+def test_redshifted_wavelengths(cache_dir):
+    sdss = read_bundled_list('SDSS')
+    infrared = read_bundled_list('Atomic-Ionic')
+    merged = linelist.LineList.merge([sdss, infrared], u.AA)
+    rest = np.array(merged['Wavelength'])
+
+    np.testing.assert_allclose(merged.redshifted_wavelengths(), rest)
+
+    # redshifts are applied per source list, without re-merging
+    infrared.setRedshift(1., 'z')
+    shifted = merged.redshifted_wavelengths()
+    from_infrared = merged.source_index == 1
+
+    np.testing.assert_allclose(shifted[from_infrared], 2 * rest[from_infrared])
+    np.testing.assert_allclose(shifted[~from_infrared], rest[~from_infrared])
+    assert np.array_equal(merged['Wavelength'], rest)
+
+
+def test_wavelengths_in(cache_dir):
+    line_list = read_bundled_list('SDSS')
+    frequencies = line_list.wavelengths_in(u.Hz)
+
+    assert line_list.wavelengths_in('Hz') is frequencies
+    np.testing.assert_allclose(
+        frequencies,
+        line_list['Wavelength'].quantity.to_value(u.Hz, u.spectral()))
+
+    # extracted lists take their values from the parent list
+    extracted = line_list.extract_range((5e14 * u.Hz, 1e15 * u.Hz))
+    assert len(extracted) > 0
+    assert np.shares_memory(extracted.wavelengths_in(u.Hz), frequencies)
+
+
+def test_count_in_range(cache_dir):
+    line_list = read_bundled_list('Reader-Corliss')
+
+    for wrange in [(4000 * u.AA, 5000 * u.AA), (0.5 * u.micron, 0.4 * u.micron),
+                   (1e15 * u.Hz, 1.5e15 * u.Hz), (1 * u.AA, 2 * u.AA)]:
+        assert line_list.count_in_range(wrange) == \
+            len(line_list.extract_range(wrange))
+
+
+def test_search(cache_dir):
+    sdss = read_bundled_list('SDSS')
+    infrared = read_bundled_list('Atomic-Ionic')
+    for line_list in (sdss, infrared):
+        linelist._linelists_cache.append(
+            linelist.LineListDescriptor.from_linelist(line_list))
+
+    index = linelist.search_index()
+    assert len(index) == len(sdss) + len(infrared)
+
+    # wavelength ranges are searched across lists, in any spectral units
+    matches = index.query('0.5-30 um')
+    assert len(matches) == 2
+    assert matches[0][0] is sdss and matches[1][0] is infrared
+    for line_list, rows in matches:
+        wavelengths = line_list['Wavelength'].quantity[rows].to_value(u.um)
+        assert np.all((wavelengths >= 0.5) & (wavelengths <= 30))
+        assert len(rows) == line_list.count_in_range((0.5 * u.um, 30 * u.um))
+
+    # species names are matched regardless of case and spacing
+    species = sdss['Species'][0]
+    for line_list, rows in index.query(species.lower().replace(' ', '')):
+        assert set(line_list['Species'][rows]) == {species}
+
+    result = linelist.search(species, units=u.nm)
+    assert result['Wavelength'].unit == u.nm
+    assert set(result['Species']) == {species}
+
+    assert linelist.search('no such species') is None
+
+
+def test_plotted_lines_columns(cache_dir):
+    from qtpy.QtCore import Qt
+    from qtpy.QtGui import QColor
+
+    from ..widgets.linelists_window import LineListTableModel
+
+    sdss = read_bundled_list('SDSS')
+    infrared = read_bundled_list('Atomic-Ionic')
+    infrared.setRedshift(1., 'z')
+    infrared.setColor(QColor('red'))
+    infrared.setHeight(0.5)
+    merged = linelist.LineList.merge([sdss, infrared], u.AA)
+
+    model = LineListTableModel(merged, plotting_columns=True)
+    colnames = [model.headerData(x, Qt.Horizontal)
+                for x in range(model.columnCount())]
+    assert colnames == merged.colnames + [linelist.REDSHIFTED_WAVELENGTH_COLUMN,
+                                          linelist.COLOR_COLUMN,
+                                          linelist.HEIGHT_COLUMN]
+
+    row = int(np.flatnonzero(merged.source_index == 1)[0])
+    z_wavelength, color, height = [
+        model.data(model.index(row, x), Qt.DisplayRole).value()
+        for x in range(len(merged.colnames), model.columnCount())]
+
+    assert float(z_wavelength) == merged.redshifted_wavelengths()[row]
+    assert color == 'red'
+    assert float(height) == 0.5
+
+    # the plotting columns are not part of the list itself
+    assert linelist.COLOR_COLUMN not in merged.colnames
+    assert LineListTableModel(sdss).columnCount() == len(sdss.colnames)
+
+    # merged lists shown in other panes, e.g. search results, do not get
+    # the plotting columns
+    assert LineListTableModel(merged).columnCount() == len(merged.colnames)
+    extracted = merged.extract_rows([0, 1])
+    assert LineListTableModel(extracted).columnCount() == len(merged.colnames)
+
+
+def test_cache_write_uses_private_temp_files(cache_dir, monkeypatch):
+    temp_paths = []
+    replace = os.replace
+
+    def recording_replace(src, dst):
+        temp_paths.append(src)
+        replace(src, dst)
+
+    monkeypatch.setattr(linelist.os, 'replace', recording_replace)
+
+    read_bundled_list('SDSS')
+    for path in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, path))
+    read_bundled_list('SDSS')
+
+    # Every write goes through a temporary file of its own, in the cache
+    # directory so that it can be renamed into place
+    assert len(temp_paths) == 2
+    assert temp_paths[0] != temp_paths[1]
+    assert all(os.path.dirname(x) == cache_dir for x in temp_paths)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_merge_positions():
+    arrays = [np.array([1., 2, 2, 5]), np.array([2., 3]), np.array([0., 2, 9])]
+
+    positions = linelist._merge_positions(arrays)
+
+    merged = np.empty(9)
+    for array, position in zip(arrays, positions):
+        merged[position] = array
+    assert list(merged) == sorted(np.concatenate(arrays))
+
+    # ties keep the order of the arrays
+    assert [list(x) for x in positions] == [[1, 2, 3, 7], [4, 6], [0, 5, 8]]
@@ -0,0 +1,176 @@
+import astropy.units as u
+import numpy as np
+from astropy.table import MaskedColumn, Table
+from qtpy.QtCore import QItemSelectionModel, QModelIndex, Qt
+from qtpy.QtGui import QColor
+
+from ..core.linelist import LineList
+from ..widgets import linelists_window
+from ..widgets.linelists_window import LineListTableModel, SortModel
+
+
+def make_linelist(name='lines', wavelengths=(5000., 3000., 4000.),
+                  intensities=(1., 3., 2.), mask=None):
+    table = Table()
+    table['Wavelength'] = np.array(wavelengths)
+    table['Wavelength'].unit = u.AA
+    table['Species'] = ['S{}'.format(i) for i in range(len(wavelengths))]
+    table['Intensity'] = MaskedColumn(np.array(intensities),
+                                      mask=mask if mask is not None else
+                                      np.zeros(len(intensities), dtype=bool))
+
+    return LineList(table, name=name)
+
+
+def cell(model, row, column):
+    return model.data(model.index(row, column), Qt.DisplayRole).value()
+
+
+def test_cell_cache(monkeypatch):
+    monkeypatch.setattr(linelists_window, 'CELL_CACHE_SIZE', 2)
+
+    model = LineListTableModel(make_linelist())
+
+    assert model.rowCount() == 3
+    assert model.columnCount() == 3
+    assert cell(model, 0, 0) == '5000.0'
+    assert cell(model, 1, 1) == 'S1'
+
+    # Reading a cell again keeps it; the least recently read one goes
+    assert cell(model, 0, 0) == '5000.0'
+    assert cell(model, 2, 0) == '4000.0'
+    assert list(model._cell_cache) == [(0, 0), (2, 0)]
+
+
+def test_sort_keys():
+    model = LineListTableModel(make_linelist(intensities=(1., 3., 2.),
+                                             mask=[False, True, False]))
+
+    # Numbers sort as floats, masked cells as NaN
+    keys = model.sort_keys(2)
+    assert keys.dtype.kind == 'f'
+    assert keys[0] == 1 and np.isnan(keys[1]) and keys[2] == 2
+    assert model.sort_keys(2) is keys
+
+    assert list(model.sort_keys(1)) == ['S0', 'S1', 'S2']
+    assert cell(model, 1, 2) == str(np.ma.masked)
+
+
+def test_plotting_columns_follow_source_lists():
+    source = make_linelist()
+    source.setColor(QColor(Qt.red))
+    merged = LineList.merge([source], u.AA)
+
+    model = LineListTableModel(merged, plotting_columns=True)
+    sort_model = SortModel(model.getName())
+    sort_model.setSourceModel(model)
+
+    z_column, color_column, height_column = range(3, 6)
+    assert [cell(model, 0, x) for x in range(3, 6)] == ['3000.0', 'red', '0.75']
+    assert list(model.sort_keys(height_column)) == [0.75] * 3
+
+    changes = []
+    sort_model.dataChanged.connect(
+        lambda top_left, bottom_right, *args: changes.append(
+            (top_left.row(), top_left.column(),
+             bottom_right.row(), bottom_right.column())))
+
+    source.setRedshift(1., 'z')
+    source.setColor(QColor(Qt.blue))
+    source.setHeight(0.5)
+    model.update_plotting_columns()
+
+    # Cells and sort keys computed from the previous values are discarded
+    assert [cell(model, 0, x) for x in range(3, 6)] == ['6000.0', 'blue', '0.5']
+    assert list(model.sort_keys(height_column)) == [0.5] * 3
+    assert cell(model, 0, 0) == '3000.0'
+
+    # Views of the sorted model are told about the change
+    assert changes == [(0, z_column, 2, height_column)]
+
+
+def sorted_column(sort_model, column):
+    return [sort_model.data(sort_model.index(row, column), Qt.DisplayRole)
+            for row in range(sort_model.rowCount())]
+
+
+def test_sort_floats_with_masked_values():
+    model = LineListTableModel(make_linelist(
+        wavelengths=(1., 2., 3., 4.), intensities=(2., 9., np.nan, 1.),
+        mask=[False, True, False, False]))
+    sort_model = SortModel(model.getName())
+    sort_model.setSourceModel(model)
+
+    # Masked and NaN values go last in both orders
+    sort_model.sort(2, Qt.AscendingOrder)
+    assert sorted_column(sort_model, 0) == ['4.0', '1.0', '2.0', '3.0']
+
+    sort_model.sort(2, Qt.DescendingOrder)
+    assert sorted_column(sort_model, 0) == ['1.0', '4.0', '2.0', '3.0']
+
+    # A negative column restores the original order
+    sort_model.sort(-1)
+    assert sorted_column(sort_model, 0) == ['1.0', '2.0', '3.0', '4.0']
+
+
+def test_sort_strings():
+    line_list = make_linelist(wavelengths=(1., 2., 3.))
+    line_list['Species'] = ['H I', 'Fe II', 'O III']
+    model = LineListTableModel(line_list)
+    sort_model = SortModel(model.getName())
+    sort_model.setSourceModel(model)
+
+    sort_model.sort(1, Qt.AscendingOrder)
+    assert sorted_column(sort_model, 1) == ['Fe II', 'H I', 'O III']
+
+    sort_model.sort(1, Qt.DescendingOrder)
+    assert sorted_column(sort_model, 1) == ['O III', 'H I', 'Fe II']
+
+
+def test_index_mapping():
+    model = LineListTableModel(make_linelist(wavelengths=(5000., 3000., 4000.)))
+    sort_model = SortModel(model.getName())
+    sort_model.setSourceModel(model)
+
+    # Without sorting, rows are mapped to themselves
+    assert sort_model.mapToSource(sort_model.index(1, 0)).row() == 1
+
+    sort_model.sort(0, Qt.AscendingOrder)
+
+    for proxy_row, source_row in enumerate([1, 2, 0]):
+        proxy_index = sort_model.index(proxy_row, 2)
+        source_index = sort_model.mapToSource(proxy_index)
+
+        assert (source_index.row(), source_index.column()) == (source_row, 2)
+        assert sort_model.mapFromSource(source_index) == proxy_index
+
+    assert not sort_model.mapToSource(QModelIndex()).isValid()
+    assert not sort_model.mapFromSource(QModelIndex()).isValid()
+    assert sort_model.headerData(0, Qt.Horizontal) == 'Wavelength'
+
+
+def test_selection_survives_sort():
+    model = LineListTableModel(make_linelist(wavelengths=(5000., 3000., 4000.)))
+    sort_model = SortModel(model.getName())
+    sort_model.setSourceModel(model)
+    selection_model = QItemSelectionModel(sort_model)
+
+    def selected_wavelengths():
+        return sorted(cell(model, sort_model.mapToSource(index).row(), 0)
+                      for index in selection_model.selectedRows())
+
+    sort_model.sort(0, Qt.AscendingOrder)
+    selection_model.select(sort_model.index(0, 0),
+                           QItemSelectionModel.Select | QItemSelectionModel.Rows)
+    selection_model.select(sort_model.index(2, 0),
+                           QItemSelectionModel.Select | QItemSelectionModel.Rows)
+    assert selected_wavelengths() == ['3000.0', '5000.0']
+
+    # The same lines stay selected, wherever they are sorted to
+    sort_model.sort(0, Qt.DescendingOrder)
+    assert selected_wavelengths() == ['3000.0', '5000.0']
+    assert sorted(x.row() for x in selection_model.selectedRows()) == [0, 2]
+
+    sort_model.sort(-1)
+    assert selected_wavelengths() == ['3000.0', '5000.0']
+    assert sorted(x.row() for x in selection_model.selectedRows()) == [0, 1]
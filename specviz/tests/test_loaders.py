@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+from astropy.io import fits
+
+from ..io.loaders import header_cache
+from ..io.loaders.apogee import apVisit_identify
+from ..io.loaders.generic_fits import fits_identify
+from ..io.loaders.hst_cos import cos_identify
+from ..io.loaders.sdss import spec_identify
+from ..io.loaders.views import flatten_sorted, stddev_from_ivar
+
+
+def write_fits(path, **keywords):
+    header = fits.Header()
+    for key, value in keywords.items():
+        header[key] = value
+
+    fits.PrimaryHDU(header=header).writeto(path, overwrite=True)
+
+
+def test_header_cache(tmpdir, monkeypatch):
+    path = str(tmpdir.join('file.fits'))
+    write_fits(path, TELESCOP='HST')
+
+    reads = []
+    getheader = fits.getheader
+
+    def counting_getheader(*args, **kwargs):
+        reads.append(args[0])
+        return getheader(*args, **kwargs)
+
+    monkeypatch.setattr(header_cache.fits, 'getheader', counting_getheader)
+
+    # The header is read once, however many times it is requested
+    header = header_cache.get_primary_header(path)
+    assert header['TELESCOP'] == 'HST'
+    assert header_cache.get_primary_header(path) is header
+    assert len(reads) == 1
+
+    # Files changed on disk are read again
+    write_fits(path, TELESCOP='JWST')
+    mtime = os.stat(path).st_mtime
+    os.utime(path, (mtime + 10, mtime + 10))
+
+    assert header_cache.get_primary_header(path)['TELESCOP'] == 'JWST'
+    assert len(reads) == 2
+
+    # Files that are not FITS are not an error
+    readme = tmpdir.join('README')
+    readme.write('not a FITS file')
+    assert header_cache.get_primary_header(str(readme)) is None
+    assert header_cache.get_primary_header(str(tmpdir.join('missing'))) is None
+    assert header_cache.get_primary_header(None) is None
+
+    # Missing extensions are not an error either
+    assert header_cache.get_header(path, 1) is None
+
+
+def test_identifiers(tmpdir):
+    cos = str(tmpdir.join('lbgu01010_x1d.fits'))
+    generic = str(tmpdir.join('generic.fits'))
+    sdss = str(tmpdir.join('spec-1234-56789-0123.fits'))
+    apogee = str(tmpdir.join('apVisit-r8-5094-55874-088.fits'))
+
+    write_fits(cos, TELESCOP='HST', INSTRUME='COS')
+    for path in (sdss, apogee):
+        write_fits(path)
+
+    table = fits.BinTableHDU.from_columns(
+        [fits.Column(name=name, format='E', array=np.ones(3))
+         for name in ('WAVE', 'FLUX', 'ERR')])
+    fits.HDUList([fits.PrimaryHDU(), table]).writeto(generic)
+
+    # The registry passes the origin first, then the file path
+    assert cos_identify('read', cos)
+    assert not cos_identify('read', generic)
+    assert spec_identify('read', sdss)
+    assert apVisit_identify('read', apogee)
+
+    # Generic FITS is a fallback that never competes with the instrument
+    # specific formats
+    assert fits_identify('read', generic)
+    for path in (cos, sdss, apogee):
+        assert not fits_identify('read', path)
+
+    readme = tmpdir.join('README')
+    readme.write('not a FITS file')
+    assert not fits_identify('read', str(readme))
+
+    # FITS files without the columns the generic loader reads are left to
+    # the other FITS readers
+    image = str(tmpdir.join('image.fits'))
+    fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(np.ones(3))]).writeto(image)
+    assert not fits_identify('read', image)
+    assert not fits_identify('read', str(tmpdir.join('primary_only.fits')))
+
+    # File objects are given without a path
+    with open(generic, 'rb') as fileobj:
+        assert not fits_identify('read', None, fileobj)
+        assert not cos_identify('read', None, fileobj)
+
+
+def test_flatten_sorted():
+    table = np.zeros(2, dtype=[('wavelength', float, 3), ('flux', float, 3)])
+    table['wavelength'] = [[4, 5, 6], [1, 2, 3]]
+    table['flux'] = [[40, 50, 60], [10, 20, 30]]
+
+    wavelength, flux = flatten_sorted(table['wavelength'], table['flux'])
+
+    np.testing.assert_array_equal(wavelength, [1, 2, 3, 4, 5, 6])
+    np.testing.assert_array_equal(flux, [10, 20, 30, 40, 50, 60])
+
+    # Table columns are strided, so flattening them always copies
+    assert not np.shares_memory(wavelength, table)
+    assert wavelength.flags.c_contiguous
+
+
+def test_stddev_from_ivar():
+    ivar = np.array([4, 1, 0.25], dtype='>f4')
+
+    np.testing.assert_allclose(stddev_from_ivar(ivar), [0.5, 1, 2])
@@ -0,0 +1,103 @@
+import astropy.units as u
+import numpy as np
+from specutils import Spectrum1D
+
+from ..core.models import DataListModel, PlotProxyModel
+
+
+def make_spectra(count):
+    return [Spectrum1D(flux=np.ones(10) * (i + 1) * u.Jy,
+                       spectral_axis=np.linspace(4000, 5000, 10) * u.AA)
+            for i in range(count)]
+
+
+def test_add_data_many(qtbot):
+    model = DataListModel()
+
+    with qtbot.waitSignal(model.rowsInserted) as blocker:
+        data_items = model.add_data_many(make_spectra(5),
+                                         ["spec{}".format(i) for i in range(5)])
+
+    # All rows are announced at once
+    assert blocker.args[1:] == [0, 4]
+    assert model.rowCount() == 5
+    assert [item.name for item in model.items] == ["spec{}".format(i)
+                                                   for i in range(5)]
+
+    for data_item in data_items:
+        assert model.item_from_id(data_item.identifier) is data_item
+
+    assert model.add_data_many([], []) == []
+    assert model.rowCount() == 5
+
+
+def test_remove_data(qtbot):
+    model = DataListModel()
+    data_items = model.add_data_many(make_spectra(6),
+                                     ["spec{}".format(i) for i in range(6)])
+    identifiers = [data_item.identifier for data_item in data_items]
+
+    model.remove_data(identifiers[0])
+
+    assert model.rowCount() == 5
+    assert model.item_from_id(identifiers[0]) is None
+
+    # Unknown identifiers are ignored
+    model.remove_data(identifiers[0])
+    assert model.rowCount() == 5
+
+    removals = []
+    model.rowsRemoved.connect(lambda parent, first, last:
+                              removals.append((first, last)))
+
+    model.remove_data_many([identifiers[i] for i in (1, 2, 4, 5)])
+
+    # Contiguous rows are removed together
+    assert removals == [(3, 4), (0, 1)]
+    assert [item.identifier for item in model.items] == [identifiers[3]]
+    assert model.item_from_id(identifiers[3]) is data_items[3]
+    assert model.item_from_id(identifiers[4]) is None
+
+
+def test_plot_proxy_model_items(qtbot):
+    model = DataListModel()
+    proxy_model = PlotProxyModel(model)
+    data_items = model.add_data_many(make_spectra(3),
+                                     ["spec{}".format(i) for i in range(3)])
+
+    # Unit compatibility is known without building plot data items
+    assert data_items[0].are_units_compatible('um', 'erg / (s cm2 Hz)')
+    assert not data_items[0].are_units_compatible('s', 'Jy')
+    assert len(proxy_model.items) == 0
+
+    index = proxy_model.index(1, 0)
+    plot_data_item = proxy_model.item_from_index(index)
+    assert plot_data_item.data_item is data_items[1]
+    assert proxy_model.item_from_index(index) is plot_data_item
+
+    assert proxy_model.take_item(index) is plot_data_item
+    assert proxy_model.take_item(index) is None
+    assert len(proxy_model.items) == 0
+
+
+def test_plot_widget_releases_removed_items(qtbot):
+    from ..widgets.plotting import PlotWidget
+
+    model = DataListModel()
+    plot_widget = PlotWidget(model=model)
+    qtbot.addWidget(plot_widget)
+
+    data_items = model.add_data_many(make_spectra(3),
+                                     ["spec{}".format(i) for i in range(3)])
+    plot_data_item = plot_widget.proxy_model.item_from_id(
+        data_items[0].identifier)
+    plot_widget.add_plot(item=plot_data_item, initialize=True)
+
+    # Inserting rows into a plot with units does not build plot data items
+    model.add_data_many(make_spectra(2), ["more0", "more1"])
+    assert list(plot_widget.proxy_model.items) == [plot_data_item]
+
+    model.remove_data(data_items[0].identifier)
+
+    assert plot_data_item not in plot_widget.listDataItems()
+    assert len(plot_widget.proxy_model.items) == 0
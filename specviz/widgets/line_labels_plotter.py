@@ -1,10 +1,17 @@
 import numpy as np
 
-from qtpy.QtCore import QEvent, Qt, QThread, Signal, QMutex, QTime
+from qtpy.QtCore import Qt, QTimer
 
-from ..core.annotation import LineIDMarker, LineIDMarkerProxy
-from ..core.linelist import LineList, \
-    REDSHIFTED_WAVELENGTH_COLUMN, MARKER_COLUMN, ID_COLUMN, COLOR_COLUMN, HEIGHT_COLUMN
+from ..core.annotation import LineIDMarkerLayer
+from ..core.linelist import LineList, ID_COLUMN
+
+# Minimum time in between two re-layouts of the markers while the plot is
+# being zoomed or panned, in milliseconds (about one display frame).
+ZOOM_INTERVAL = 16
+
+# Time after the last redshift change before the displayed subset of
+# markers is chosen again, in milliseconds.
+REDSHIFT_SETTLE_INTERVAL = 100
 
 
 class LineLabelsPlotter(object):
@@ -23,20 +30,47 @@ class LineLabelsPlotter(object):
         self._linelists = caller.linelists
         self._plot_item = caller._plot_item
 
-        # create a new, empty list that will store and help track down
-        # which markers are actually being displayed at any time.
-        self._markers_on_screen = []
+        # all markers displayed on screen are drawn by a single item.
+        self._marker_layer = LineIDMarkerLayer(
+            tooltip_provider=self._marker_tooltip)
+
+        # the merged list of the lines being plotted, if any.
+        self._merged_linelist = None
+
+        # Zoom events come in bursts, in particular when zooming or panning
+        # with the mouse. Instead of re-laying out the markers for every
+        # event, the first event of a burst starts a single shot timer, and
+        # the markers are re-laid out for the then current view range when
+        # it times out. Further events received before that are coalesced
+        # into the same re-layout. Nothing runs while the plot is idle.
+        self._zoom_timer = QTimer()
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(ZOOM_INTERVAL)
+        self._zoom_timer.timeout.connect(self._handle_zoom)
+        self._is_zooming = False
+
+        # While a redshift is being changed interactively, the markers
+        # already on screen are just moved. The de-cluttering is done
+        # again once the redshift stops changing.
+        self._redshift_timer = QTimer()
+        self._redshift_timer.setSingleShot(True)
+        self._redshift_timer.setInterval(REDSHIFT_SETTLE_INTERVAL)
+        self._redshift_timer.timeout.connect(self._handle_redshift)
+        self._plotted_panes = []
+        self._visible_rows = np.array([], dtype=int)
 
-        self._caller.mouse_enterexit.connect(self._handle_mouse_events)
         self._caller.dismiss_linelists_window.connect(self._dismiss_linelists_window)
         self._caller.erase_linelabels.connect(self._erase_linelabels)
 
-    # Buffering of zoom events.
-    def process_zoom_signal(self):
-        if hasattr(self, '_zoom_markers_thread') and self._zoom_markers_thread:
+    # Coalescing of zoom events. This handles any change in the view range,
+    # whether it comes from the mouse, the keyboard, or from code.
+    def process_zoom_signal(self, *args):
+        # range changes caused by the re-layout itself are ignored.
+        if self._merged_linelist is None or self._is_zooming:
+            return
 
-            # for now, any object can be used as a zoom message.
-            self._zoom_event_buffer.put(1)
+        if not self._zoom_timer.isActive():
+            self._zoom_timer.start()
 
 #--------  Slots.
 
@@ -58,7 +92,10 @@ class LineLabelsPlotter(object):
             self._remove_linelabels_from_plot()
             self._linelist_window.erasePlottedLines()
 
-            self._destroy_zoom_markers_thread()
+            self._zoom_timer.stop()
+            self._redshift_timer.stop()
+            self._merged_linelist = None
+            self._plotted_panes = []
 
     # Main method for drawing line labels on the plot surface.
     def plot_linelists(self, table_views, panes, units, caller, **kwargs):
@@ -81,10 +118,10 @@ class LineLabelsPlotter(object):
             # must map between view and underlying model
             # because of row sorting.
             selected_rows = table_view.selectionModel().selectedRows()
-            model_selected_rows = []
-            for sr in selected_rows:
-                model_row = table_view.model().mapToSource(sr)
-                model_selected_rows.append(model_row)
+            model_selected_rows = np.fromiter(
+                (table_view.model().mapToSource(sr).row()
+                 for sr in selected_rows),
+                dtype=int, count=len(selected_rows))
 
             new_list = line_list.extract_rows(model_selected_rows)
 
@@ -119,47 +156,55 @@ class LineLabelsPlotter(object):
         # Finally, plot labels.
         self._go_plot_markers(merged_linelist)
 
-        # Zooming the markers is a tricky business. On top of saving some plot
-        # time by having the plot being de-cluttered at every zoom step, we
-        # must control the rate at which the time-consuming zoom operation is
-        # run, to prevent the app to become unresponsive. We use a threaded
-        # mechanism to store zoom request events in a buffer, and then manage
-        # its size, and the speed at which its contents get consumed.
-        #
-        # Notice that we can't use the dispatch mechanism to manage the zoom
-        # thread and its signal-slot dependencies. Something in the dispatch
-        # code messes up with the timing relationships in the GUI and secondary
-        # threads, causing the “Timers cannot be started from another thread”
-        # warning, and eventual app crash. We have to manage signals with explicit
-        # code within the thread and in here.
-        self._zoom_event_buffer = ZoomEventBuffer()
-        self._zoom_markers_thread = ZoomMarkersThread(self, len(merged_linelist))
-        self._zoom_markers_thread.do_zoom.connect(self._handle_zoom)
-
         # Populate the plotted lines pane in the line list window.
         if hasattr(self, '_linelist_window') and self._linelist_window:
             self._linelist_window.displayPlottedLines(merged_linelist)
 
         # The new line list just created becomes the default for
-        # use in subsequent operations.
+        # use in subsequent operations. Each pane is kept with the
+        # list built from it, so that the pane controls can change
+        # the plotted lines later on.
         self._merged_linelist = merged_linelist
+        self._plotted_panes = list(panes)
+
+    def set_redshift(self, pane, redshift, z_units):
+        """
+        Changes the redshift of the plotted lines that come from
+        a line list pane, and moves their markers on screen.
+
+        This is meant to be called at every step of an interactive
+        change (e.g. a slider being dragged), so the lines are not
+        merged again: the new positions of the markers currently on
+        screen are computed in one vectorized operation.
+
+        Parameters
+        ----------
+        pane : LineListPane
+            The pane the lines were plotted from.
+        redshift : float
+            The new redshift.
+        z_units : str
+            The redshift units ('z' or 'km/s').
+        """
+        merged_linelist = self._merged_linelist
+        if merged_linelist is None:
+            return
 
-    # Turns time-consuming processing in the zoom thread on/off when
-    # mouse enter/leaves the plot. This enables other parts of the
-    # app to retain their full computational speed when the mouse
-    # pointer is outside the plot window.
-    def _handle_mouse_events(self, event_type):
-        if hasattr(self, '_zoom_markers_thread') and self._zoom_markers_thread:
-            is_processing = self._zoom_markers_thread.is_processing
+        changed = False
+        for plotted_pane, linelist in zip(self._plotted_panes,
+                                          merged_linelist.source_lists):
+            if plotted_pane is pane:
+                linelist.setRedshift(redshift, z_units)
+                changed = True
 
-            # Detects when mouse entered the plot area but the thread is not processing yet.
-            if event_type == QEvent.Enter and not is_processing:
-                self._zoom_markers_thread.start_processing()
-                return
+        if not changed:
+            return
+
+        self._positions = merged_linelist.redshifted_wavelengths()
+
+        self._marker_layer.set_positions(self._positions[self._visible_rows])
 
-            # Detects the complementary condition: mouse exited plot and thread still processing.
-            if event_type == QEvent.Leave and is_processing:
-                self._zoom_markers_thread.stop_processing()
+        self._redshift_timer.start()
 
 #--------  Private methods.
 
@@ -169,320 +214,227 @@ class LineLabelsPlotter(object):
         # the generic case. Maybe derive heights from curve data
         # instead? Make the markers follow the curve ups and downs?
         #
-        # Ideally we would like to have the marker's X coordinate
-        # pinned down to the plot surface in data value, and the Y
-        # coordinate pinned down in screen value. This would make
-        # the markers to stay at the same height in the window even
-        # when the plot is zoomed. The elegant nice way to do this
-        # would be via the marker objects themselves to reposition
-        # themselves on screen. This did not work though. There seems
-        # to be a clash (maybe thread-related) in between the setPos
-        # method and the auto-range facility in pyqtgraph.
+        # The marker's X coordinate is pinned down to the plot surface
+        # in data value, and the Y coordinate is pinned down in screen
+        # value. This makes the markers stay at the same height in the
+        # window even when the plot is zoomed.
         #
-        # We managed to get the pinning in Y by brute force: remove
-        # the markers and re-draw them in the new zoomed coordinates.
-        # Note that it's not enough to remove a marker, reset its position,
-        # and add it back to the plot. It's necessary to rebuild a new
-        # marker instance. This probably has to do with the affine
-        # transform objects that are stored inside each TextItem instance.
-        # These transforms do not behave as expected when we run everything
-        # with auto range turned on. Switching auto range on and off when
-        # necessary does not work either.
+        # Markers used to be individual TextItem instances, which had to
+        # be removed and re-built at every zoom step. Profiling showed
+        # that the TextItem constructor, and the addItem and removeItem
+        # calls, were responsible for most of the zoom CPU time. All the
+        # markers are now drawn by a single LineIDMarkerLayer item, which
+        # is given new marker positions at every zoom step.
         #
-        # Profiling experiments showed that almost all the cost is spent inside
-        # the pyqtgraph TextItem constructor. The total cost of this re-build
-        # approach amounts to about 15-20% of the CPU time spent in zooming.
-        # This is now being handled by a proxy instantiation mechanism. Profiling
-        # experiments with the proxy mechanism in place show that the time taken
-        # by the TextItem constructor drops to 4% of total CPU time.
-        #
-        # The pinning of the Y coordinate is handled by the handle_zoom method
-        # that in turn relies in the storage of marker instances row-wise in the
-        # line list table.
+        # The pinning of the Y coordinate is handled by the handle_zoom
+        # method, which re-computes the marker positions for the zoomed
+        # coordinates.
         plot_item = self._plot_item
 
-        height = self._compute_height(merged_linelist, plot_item)
-
-        # column names are defined in the YAML files
-        # or by constants elsewhere.
-        wave_column = merged_linelist.columns[REDSHIFTED_WAVELENGTH_COLUMN]
-        id_column = merged_linelist.columns[ID_COLUMN]
-        color_column = merged_linelist[COLOR_COLUMN]
-
-        # To enable marker removal from plot, markers are stored
-        # row-wise so as to match row selections in table views.
-        markers = merged_linelist[MARKER_COLUMN]
-
-        for row_index in range(len(wave_column)):
-
-            # tool tip contains all info in table.
-            tool_tip = ""
-            for col_index in range(len(merged_linelist.columns)):
-                col_name = merged_linelist.colnames[col_index]
-                if not col_name in [COLOR_COLUMN]:
-                    value = merged_linelist.columns[col_index][row_index]
-                    tool_tip += col_name + '=' + str(value) + ', '
-
-            # For now, use proxy markers to speed up processing.
-            marker = LineIDMarkerProxy(wave_column[row_index],
-                                       height[row_index],
-                                       text=id_column[row_index],
-                                       plot_item=plot_item,
-                                       tip=tool_tip,
-                                       color=color_column[row_index],
-                                       orientation='vertical')
-
-            markers[row_index] = marker
-
-        # after all markers are created, check their positions
-        # and disable some to de-clutter the plot.
-        new_markers = self._declutter(markers)
+        # index the marker positions so that only a de-cluttered
+        # subset of them gets displayed.
+        self._update_positions(merged_linelist)
 
         # place markers on screen
-        for marker_proxy in new_markers:
-            if marker_proxy:
-                # build eal, full-fledged marker from proxy.
-                real_marker = LineIDMarker(marker_proxy)
-                real_marker.setPos(real_marker.x0, real_marker.y0)
-
-                self._plot_item.addItem(real_marker)
-                self._markers_on_screen.append(real_marker)
+        plot_item.addItem(self._marker_layer)
+        self._update_markers(merged_linelist)
 
-        plot_item.update()
-
-    # Slot called by the zoom control thread.
+    # Slot called by the zoom timer.
     def _handle_zoom(self):
         # this method may be called by zoom signals that can be emitted
         # when a merged line list is not available yet.
-        if hasattr(self, '_merged_linelist'):
-
-            # Experiments with timing
-            # self.Cron = QTime(0,0,0,0)
-            # self.Cron.start()
-
-            # update height column in line list based on
-            # the new, zoomed coordinates.
-            height_array = self._compute_height(self._merged_linelist, self._plot_item)
-
-            # remove markers that are displaying right now
-            for index in range(len(self._markers_on_screen)):
-                marker = self._markers_on_screen[index]
-                self._plot_item.removeItem(marker)
-            self._markers_on_screen = []
-
-            # update markers based on what is stored in the
-            # marker_list table column.
-            marker_list = self._merged_linelist[MARKER_COLUMN]
-            for index in range(len(marker_list)):
-                marker = marker_list[index]
-
-                # New marker is built with same parameters as older marker that was
-                # just removed, but for the new Y position.
-                #
-                # Note that it's not enough to remove a marker, reset its position,
-                # and add it back to the plot. It's necessary to rebuild a new marker
-                # instance. This probably has to do with the affine transform objects
-                # that are stored inside each TextItem instance. These transforms do not
-                # behave as expected when we run everything with auto range turned on.
-                # Switching auto range on and off when necessary does not work either.
-                #
-                # Profiling experiments showed that almost all the cost is spent inside
-                # the pyqtgraph TextItem constructor. The total cost of this re-build
-                # approach amounts to about 15-20% of the CPU time spent in zooming.
-                # This is now being handled by a proxy instantiation mechanism. Profiling
-                # experiments with the proxy mechanism in place show that the time taken
-                # by the TextItem constructor drops to 4% of total CPU time.
-
-                new_marker = LineIDMarkerProxy(marker.x0, height_array[index], proxy=marker)
-
-                # Replace old marker with new.
-                marker_list[index] = new_marker
-
-            # after all markers are created, check their relative positions
-            # on screen and disable some to de-clutter the plot.
-            decluttered_list = self._declutter(marker_list)
-
-            # Finally, add the de-cluttered new markers to the plot.
-            for marker_proxy in decluttered_list:
-                if marker_proxy:
-                    # build real, full-fledged marker from proxy.
-                    real_marker = LineIDMarker(marker_proxy)
-                    real_marker.setPos(real_marker.x0, real_marker.y0)
-
-                    self._plot_item.addItem(real_marker)
-                    self._markers_on_screen.append(real_marker)
-
-            self._plot_item.update()
-
-            # took = self.Cron.elapsed()
-            # print("took: {0} msec" .format(str(took)))
-
-            self._zoom_markers_thread.zoom_end.emit()
-
-    # compute height to display each marker
-    def _compute_height(self, merged_linelist, plot_item):
-        data_range = plot_item.viewRange()
-        ymin = data_range[1][0]
-        ymax = data_range[1][1]
-
-        return (ymax - ymin) * merged_linelist.columns[HEIGHT_COLUMN] + ymin
-
-    # Returns a new list with proxy marker instances to be plotted.
-    # This list is a (shallow) copy of the input list, where object
-    # references are set to None whenever their distance in X+Y pixels
-    # to the next neighbor is smaller than a given threshold.
-    #
-    # Using both X and Y as a distance criterion ensures that markers
-    # displayed at different heights are not removed from the plot,
-    # even when their X coordinate places them too close to each other.
-    #
-    # NOTE: However, using the sum of X and Y distances causes a lot more
-    # markers to be displayed when separate data sets, both with large number
-    # of lines, are displayed at different heights on screen. In a way, it
-    # defeats the purpose of de-cluttering. And makes the code run slower:
-    # right now, the CPU bottleneck is in the np.array() constructors that
-    # build the X and Y arrays. Temporarily, we remove the Y array entirely.
-    # In case this needs more work, users will give us feedback eventually.
-    #
-    # With these optimizations in place, about 7% of the CPU time spent
-    # in zooming is due to the _declutter method. Almost all of it is in
-    # line 341 (list comprehension + np.array() constructor).
-
-    def _declutter(self, marker_list):
-        if len(marker_list) > 10:
-            threshold = 5
-
-            data_range = self._plot_item.viewRange()
-            x_pixels = self._plot_item.sceneBoundingRect().width()
-            # y_pixels = self._plot_item.sceneBoundingRect().height()
-            xmin = data_range[0][0]
-            xmax = data_range[0][1]
-            # ymin = data_range[1][0]
-            # ymax = data_range[1][1]
-
-            # compute X and Y distances in between markers, in screen pixels
-            x = np.array([marker.x0 for marker in marker_list])
-            xdist = np.diff(x)
-            xdist *= x_pixels / (xmax - xmin)
-            # y = np.array([marker.y0 for marker in marker_list])
-            # ydist = np.diff(y)
-            # ydist *= y_pixels / (ymax - ymin)
-
-            # replace cluttered markers with None
-            # new_array = np.where((xdist + ydist) < threshold, None, np.array(marker_list[1:]))
-            new_array = np.where(xdist < threshold, None, np.array(marker_list[1:]))
-
-            # replace markers currently outside the wave range with None
-            new_array_2 = np.where(x[1:] < xmin, None, new_array)
-            new_array_3 = np.where(x[1:] > xmax, None, new_array_2)
-            new_list = new_array_3.tolist()
-
-            # make sure at least a few markers show
-            if new_list.count(None) >= len(new_list) - 3:
-                mid = int(len(new_list) / 2)
-                mid_1 = int(max(0, mid - 8))
-                mid_2 = int(min(mid + 8, len(new_list)-1))
-                new_list[mid] = marker_list[mid]
-                new_list[mid_1] = marker_list[mid_1]
-                new_list[mid_2] = marker_list[mid_2]
-
-            return new_list
-        else:
-            return marker_list
-
-    def _remove_linelabels_from_plot(self):
-        if hasattr(self, '_merged_linelist'):
-            markers = self._markers_on_screen
-            for index in range(len(markers)):
-                self._plot_item.removeItem(markers[index])
-            self._plot_item.update()
-            self._markers_on_screen = []
+        if self._merged_linelist is None:
+            return
 
-    def _destroy_zoom_markers_thread(self):
-        if hasattr(self, '_zoom_markers_thread') and self._zoom_markers_thread:
-            self._zoom_markers_thread.stop_processing()
-            self._zoom_markers_thread = None
+        self._is_zooming = True
+        try:
+            self._update_markers(self._merged_linelist)
+        finally:
+            self._is_zooming = False
+
+    # Computes the marker X coordinates from the rest wavelengths and
+    # the redshift of each source list. The redshift is applied here, as
+    # a transform of the plotted positions, so that the merged line list
+    # never has to be re-built when a redshift changes.
+    def _update_positions(self, merged_linelist):
+        self._positions = merged_linelist.redshifted_wavelengths()
+
+        self._declutter_index = LabelDeclutterIndex(
+            self._positions, _line_priority(merged_linelist))
+
+    # Slot called by the redshift timer, once the redshift stopped
+    # changing. The labels to display are chosen again for the new
+    # marker positions, and the plotted lines pane shows the new
+    # redshifted wavelengths.
+    def _handle_redshift(self):
+        if self._merged_linelist is None:
+            return
 
+        self._update_positions(self._merged_linelist)
+        self._update_markers(self._merged_linelist)
 
-class ZoomMarkersThread(QThread):
+        if self._linelist_window:
+            self._linelist_window.updatePlottedLines()
 
-    # Notice that we can't use the dispatch mechanism to manage the zoom
-    # thread and its signal-slot dependencies. Something in the dispatch
-    # code messes up with the timing relationships in the GUI and secondary
-    # threads, causing the “Timers cannot be started from another thread”
-    # warning, and eventual app crash. We have to manage locally-defined
-    # signals instead, explicitly connecting them with their slots
+    # Updates the markers on screen for the current view range.
+    def _update_markers(self, merged_linelist):
+        visible_rows = self._declutter()
+        self._visible_rows = visible_rows
 
-    do_zoom = Signal()
-    zoom_end = Signal()
+        # heights based on the new, zoomed coordinates.
+        height_array = self._compute_height(merged_linelist, self._plot_item,
+                                            visible_rows)
 
-    def __init__(self, caller, npoints):
-        super(ZoomMarkersThread, self).__init__()
-        self.buffer = caller._zoom_event_buffer
-        self.npoints = npoints
-        self.is_processing = False
-        self.is_zooming = False
+        id_column = merged_linelist[ID_COLUMN]
+        source_lists = merged_linelist.source_lists
+        source_index = merged_linelist.source_index[visible_rows]
 
-        self.zoom_end.connect(self.zoom_finished)
+        self._marker_layer.set_markers(
+            self._positions[visible_rows],
+            height_array,
+            [id_column[row] for row in visible_rows],
+            [source_lists[i].color for i in source_index],
+            rows=visible_rows)
 
-    def run(self):
-        while(self.is_processing):
+        self._plot_item.update()
 
-            value = self.buffer.get()
-            if value:
-                self.do_zoom.emit()
+    # Tool tip of the marker at the given row of the merged line list.
+    # Tool tips contain all info in table. They are only built when the
+    # mouse hovers over a marker, so plotting does no string formatting.
+    def _marker_tooltip(self, row):
+        merged_linelist = self._merged_linelist
+        if merged_linelist is None:
+            return ''
 
-                self.is_zooming = True
+        values = []
+        for col_name in merged_linelist.colnames:
+            value = merged_linelist[col_name][row]
+            values.append(col_name + '=' + str(value))
 
-                # wait for zoom to finish.
-                while(self.is_zooming):
-                    QThread.msleep(10)
+        return ', '.join(values)
 
-            # one more, to prevent hiccups.
-            QThread.msleep(10)
+    # compute height to display the markers at the given rows
+    def _compute_height(self, merged_linelist, plot_item, rows):
+        data_range = plot_item.viewRange()
+        ymin = data_range[1][0]
+        ymax = data_range[1][1]
 
-    def zoom_finished(self):
-        self.is_zooming = False
+        # each line is displayed at the height of the list it comes from.
+        heights = np.array([linelist.height
+                            for linelist in merged_linelist.source_lists])
 
-    def start_processing(self):
-        self.is_processing = True
-        self.start()
+        return (ymax - ymin) * heights[merged_linelist.source_index[rows]] + ymin
 
-    def stop_processing(self):
-        self.is_processing = False
-        self.buffer.clear()
+    # Returns the row indices, in the merged line list, of the markers
+    # to be displayed in the current view range. The view is divided in
+    # buckets a few pixels wide, and at most one marker is displayed in
+    # each bucket: the one with the highest priority (line strength).
+    #
+    # Only X distances are used as a de-cluttering criterion. Using the
+    # sum of X and Y distances causes a lot more markers to be displayed
+    # when separate data sets, both with large number of lines, are
+    # displayed at different heights on screen, which defeats the purpose
+    # of de-cluttering.
 
+    def _declutter(self, threshold=5):
+        data_range = self._plot_item.viewRange()
+        x_pixels = self._plot_item.sceneBoundingRect().width()
 
-class ZoomEventBuffer(object):
+        return self._declutter_index.visible(data_range[0][0], data_range[0][1],
+                                             x_pixels / threshold)
 
-    # A mutex-lockable buffer that stores zoom request events.
+    def _remove_linelabels_from_plot(self):
+        if self._merged_linelist is not None:
+            self._marker_layer.clear()
+            self._plot_item.removeItem(self._marker_layer)
+            self._plot_item.update()
 
-    def __init__(self):
-        self.buffer = []
-        self.mutex = QMutex()
 
-    def clear(self):
-        self.mutex.lock()
-        self.buffer = []
-        self.mutex.unlock()
+def _line_priority(linelist, column_name='Intensity'):
+    # Line strength, used to choose in between labels competing for the
+    # same screen location. Lines with no known strength rank lowest.
+    if column_name in linelist.colnames:
+        try:
+            column = linelist[column_name]
+            priority = np.ma.filled(np.ma.asarray(column, dtype=float), np.nan)
+            return np.where(np.isnan(priority), -np.inf, priority)
+        except (TypeError, ValueError):
+            pass
 
-    def put(self, value):
-        self.mutex.lock()
+    return None
 
-        # Don't let the buffer fill up too much.
-        # Keep just the most recent zoom events.
-        while len(self.buffer) > 5:
-            self.buffer.pop()
 
-        self.buffer.insert(0, value)
+class LabelDeclutterIndex(object):
+    """
+    Positions of the line labels, sorted by wavelength, used to choose
+    which labels to display in a given view range.
+
+    The cost of choosing the labels depends on the number of labels in
+    the view range only, not on the total number of labels.
+
+    Parameters
+    ----------
+    x : array
+        The positions of the labels, in data coordinates.
+    priority : array, optional
+        The priority of each label (e.g. line strength). Within each
+        bucket, the label with the highest priority is displayed, and in
+        case of ties, the one with the shortest wavelength.
+    """
+    def __init__(self, x, priority=None):
+        x = np.asarray(x, dtype=float)
+
+        self._order = np.argsort(x, kind='mergesort')
+        self._x = x[self._order]
+
+        self._priority = None
+        if priority is not None:
+            self._priority = np.asarray(priority, dtype=float)[self._order]
+
+    def __len__(self):
+        return len(self._x)
+
+    def visible(self, xmin, xmax, nbuckets):
+        """
+        Returns the indices of the labels to display within a view range.
+
+        Parameters
+        ----------
+        xmin, xmax : float
+            The view range, in data coordinates.
+        nbuckets : float
+            The number of buckets the view range is divided into. At most
+            one label is displayed in each bucket.
+
+        Returns
+        -------
+        : :class:`~numpy.ndarray`
+            The indices of the labels in the original order, sorted.
+        """
+        first = np.searchsorted(self._x, xmin, side='left')
+        last = np.searchsorted(self._x, xmax, side='right')
+
+        if first >= last or xmax <= xmin or nbuckets <= 0:
+            return np.array([], dtype=int)
+
+        x = self._x[first:last]
+        buckets = ((x - xmin) * (nbuckets / (xmax - xmin))).astype(int)
+
+        # buckets are sorted, since positions are.
+        starts = np.concatenate(
+            ([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+
+        if self._priority is None:
+            chosen = starts
+        else:
+            priority = self._priority[first:last]
+            best = np.maximum.reduceat(priority, starts)
+            sizes = np.diff(np.append(starts, len(x)))
 
-        self.mutex.unlock()
+            # first label in each bucket that has the best priority.
+            candidates = np.flatnonzero(priority == np.repeat(best, sizes))
+            candidate_buckets = buckets[candidates]
+            chosen = candidates[np.concatenate(
+                ([True], candidate_buckets[1:] != candidate_buckets[:-1]))]
 
-    def get(self):
-        self.mutex.lock()
-        if len(self.buffer) > 0:
-            value = self.buffer.pop()
-        else:
-            value = None
-        self.mutex.unlock()
-        return value
+        return np.sort(self._order[first + chosen])
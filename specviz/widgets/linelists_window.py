@@ -2,6 +2,9 @@
 Define all the line list-based windows and dialogs
 """
 import os
+from collections import OrderedDict
+
+import numpy as np
 
 from qtpy.QtWidgets import (QWidget, QGridLayout, QHBoxLayout, QLabel,
                             QPushButton, QTabWidget, QVBoxLayout, QSpacerItem,
@@ -12,7 +15,8 @@ from qtpy.QtWidgets import (QWidget, QGridLayout, QHBoxLayout, QLabel,
 from qtpy.QtGui import QIcon, QColor, QStandardItem, \
                        QDoubleValidator, QFont
 from qtpy.QtCore import (Signal, QSize, QCoreApplication, QMetaObject, Qt,
-                         QAbstractTableModel, QVariant, QSortFilterProxyModel)
+                         QAbstractTableModel, QAbstractProxyModel, QModelIndex,
+                         QVariant)
 from qtpy import compat
 from qtpy.uic import loadUi
 
@@ -22,7 +26,8 @@ from astropy.io import ascii
 
 from ..core import linelist
 from ..core.linelist import WAVELENGTH_COLUMN, ERROR_COLUMN, DEFAULT_HEIGHT
-from ..core.linelist import columns_to_remove
+from ..core.linelist import (REDSHIFTED_WAVELENGTH_COLUMN, COLOR_COLUMN,
+                             HEIGHT_COLUMN)
 
 ICON_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
                                          '..', 'data', 'qt', 'resources'))
@@ -44,9 +49,40 @@ ID_COLORS = {
 PLOTTED = "Plotted"
 NLINES_WARN = 150
 
+# number of formatted cells kept by each table model.
+CELL_CACHE_SIZE = 10000
+
+# range covered by the redshift slider, for each redshift unit,
+# and number of steps in that range.
+REDSHIFT_SLIDER_RANGES = {
+    'z':    (0., 5.),
+    'km/s': (-10000., 10000.)
+}
+REDSHIFT_SLIDER_STEPS = 5000
+
 wave_range = (None, None)
 
 
+# Function that finds the name of the color in ID_COLORS closest to a QColor.
+
+def _color_name(color):
+    # We just go to the basics and compare color equality (or
+    # closeness) using a distance criterion in r,g,b coordinates.
+    r = color.red()
+    g = color.green()
+    b = color.blue()
+    min_dist = 100000
+    result = None
+    for color_name, orig_color in ID_COLORS.items():
+        orig_rgb = QColor(orig_color)
+        dist = abs(orig_rgb.red() - r) + abs(orig_rgb.green() - g) + abs(orig_rgb.blue() - b)
+        if dist < min_dist:
+            min_dist = dist
+            result = color_name
+
+    return result
+
+
 # Function that creates one single tabbed pane with one single view of a line list.
 
 def _createLineListPane(linelist, table_model, caller):
@@ -121,6 +157,15 @@ class LineListsWindow(ClosableMainWindow):
         self.line_list_selector.setToolTip("Select line list from internal library")
         self.mainToolBar.addWidget(self.line_list_selector)
 
+        # search box for lines in all line lists.
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search lines")
+        self.search_box.setToolTip("Search all line lists by species (e.g. 'Fe II') "
+                                   "or wavelength (e.g. '6563', '650-660 nm')")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setMaximumWidth(250)
+        self.mainToolBar.addWidget(self.search_box)
+
         # QtDesigner creates tabbed widgets with 2 tabs, and doesn't allow
         # removing then in the designer itself. Remove in here then.
         while self.tabWidget.count() > 0:
@@ -176,6 +221,7 @@ class LineListsWindow(ClosableMainWindow):
         self.actionOpen.triggered.connect(lambda:self._open_linelist_file(file_name=None))
         self.actionExport.triggered.connect(lambda:self._export_to_file(file_name=None))
         self.line_list_selector.currentIndexChanged.connect(self._lineList_selection_change)
+        self.search_box.returnPressed.connect(self._search_lines)
         self.tabWidget.tabCloseRequested.connect(self.tab_close)
 
     def _get_waverange_from_dialog(self, line_list):
@@ -224,10 +270,6 @@ class LineListsWindow(ClosableMainWindow):
 
                 output_table = self._plotted_lines_pane.plotted_lines.table
 
-                for colum_name in columns_to_remove:
-                    if colum_name in output_table.colnames:
-                        output_table.remove_column(colum_name)
-
                 ascii.write(output_table, output=file_name, format='ecsv')
 
     def _lineList_selection_change(self, index):
@@ -249,6 +291,30 @@ class LineListsWindow(ClosableMainWindow):
                 error_dialog.showMessage('Units conversion not possible.')
                 error_dialog.exec_()
 
+    # the lines found in all line lists are displayed in a new
+    # tab, where they can be selected and plotted as any list.
+    def _search_lines(self):
+        query = self.search_box.text().strip()
+        if not query:
+            return
+
+        try:
+            line_list = linelist.search(query, units=self.plot_window.waverange[0].unit)
+
+        except UnitConversionError as err:
+            error_dialog = QErrorMessage()
+            error_dialog.showMessage('Units conversion not possible.')
+            error_dialog.exec_()
+            return
+
+        if line_list is None:
+            error_dialog = QErrorMessage()
+            error_dialog.showMessage('No lines found for: ' + query)
+            error_dialog.exec_()
+            return
+
+        self._build_view(line_list, 0)
+
     def _build_waverange_dialog(self, wave_range, line_list):
 
         dialog = QDialog(parent=self.centralWidget)
@@ -267,10 +333,11 @@ class LineListsWindow(ClosableMainWindow):
         dialog.nlines_label = self._compute_nlines_in_waverange(line_list, dialog.min_text, dialog.max_text,
                                                                 dialog.nlines_label)
 
-        dialog.min_text.editingFinished.connect(lambda: self._compute_nlines_in_waverange(line_list,
-                                                 dialog.min_text, dialog.max_text, dialog.nlines_label))
-        dialog.max_text.editingFinished.connect(lambda: self._compute_nlines_in_waverange(line_list,
-                                                 dialog.min_text, dialog.max_text, dialog.nlines_label))
+        # the line count is updated as the user types.
+        dialog.min_text.textEdited.connect(lambda: self._compute_nlines_in_waverange(line_list,
+                                            dialog.min_text, dialog.max_text, dialog.nlines_label))
+        dialog.max_text.textEdited.connect(lambda: self._compute_nlines_in_waverange(line_list,
+                                            dialog.min_text, dialog.max_text, dialog.nlines_label))
 
         accepted = dialog.exec_() > 0
 
@@ -297,15 +364,16 @@ class LineListsWindow(ClosableMainWindow):
     # computes how many lines in the supplied list
     # fall within the supplied wavelength range. The
     # result populates the supplied label. Or, it
-    # builds a fresh QLabel with the result.
+    # builds a fresh QLabel with the result. Lines
+    # are counted with a binary search, so this is
+    # cheap enough to be run on every edit.
     def _compute_nlines_in_waverange(self, line_list, min_text, max_text, label):
 
         amin, amax = self._get_range_from_textfields(min_text, max_text)
 
         if amin != None or amax != None:
             r = (amin, amax)
-            extracted = line_list.extract_range(r)
-            nlines = len(extracted[WAVELENGTH_COLUMN].data)
+            nlines = line_list.count_in_range(r)
 
             label.setText(str(nlines))
             color = 'black' if nlines < NLINES_WARN else 'red'
@@ -362,6 +430,12 @@ class LineListsWindow(ClosableMainWindow):
     def tab_close(self, index):
         self.tabWidget.removeTab(index)
 
+    def updatePlottedLines(self):
+        # The plotted lines are the same, but the lists they come from
+        # changed, e.g. their redshift.
+        if hasattr(self, '_plotted_lines_pane') and self._plotted_lines_pane:
+            self._plotted_lines_pane.table_model.update_plotting_columns()
+
     def displayPlottedLines(self, linelist):
         self._plotted_lines_pane = PlottedLinesPane(linelist)
 
@@ -467,6 +541,14 @@ class LineListPane(QWidget):
             item = QStandardItem(uname)
             model.appendRow(item)
 
+        # the redshift slider moves the plotted lines as it is dragged.
+        # The text box and the slider always show the same redshift.
+        self.button_pane.redshift_slider.setRange(0, REDSHIFT_SLIDER_STEPS)
+        self._sync_redshift_slider()
+        self.button_pane.redshift_slider.valueChanged.connect(self._redshift_slider_moved)
+        self.button_pane.redshift_textbox.editingFinished.connect(self._redshift_text_changed)
+        self.button_pane.combo_box_z_units.currentIndexChanged.connect(self._redshift_text_changed)
+
         # put it all together
         panel_layout.addWidget(info)
         panel_layout.addWidget(table_view)
@@ -487,11 +569,12 @@ class LineListPane(QWidget):
         # build list with only the selected rows. These must be model
         # rows, not view rows!
         selected_view_rows = self.table_view.selectionModel().selectedRows()
-        selected_model_rows = [self._sort_proxy.mapToSource(x) for x in selected_view_rows]
+        selected_model_rows = np.fromiter(
+            (self._sort_proxy.mapToSource(x).row() for x in selected_view_rows),
+            dtype=int, count=len(selected_view_rows))
 
         if len(selected_model_rows) > 0:
-            r = [x for x in selected_model_rows]
-            local_list = self.linelist.extract_rows(r)
+            local_list = self.linelist.extract_rows(selected_model_rows)
 
             # name is used to match lists with table views
             local_list.name = self.linelist.name
@@ -508,6 +591,50 @@ class LineListPane(QWidget):
     def tab_close(self, index):
         self._sets_tabbed_pane.removeTab(index)
 
+    def _redshift_range(self):
+        z_units = self.button_pane.combo_box_z_units.currentText()
+        return REDSHIFT_SLIDER_RANGES.get(z_units, REDSHIFT_SLIDER_RANGES['z'])
+
+    # places the slider at the redshift in the text box, without
+    # triggering the slider signals.
+    def _sync_redshift_slider(self):
+        textbox = self.button_pane.redshift_textbox
+        if not textbox.hasAcceptableInput():
+            return
+
+        zmin, zmax = self._redshift_range()
+        value = (float(textbox.text()) - zmin) / (zmax - zmin) * REDSHIFT_SLIDER_STEPS
+
+        slider = self.button_pane.redshift_slider
+        slider.blockSignals(True)
+        slider.setValue(int(round(np.clip(value, 0, REDSHIFT_SLIDER_STEPS))))
+        slider.blockSignals(False)
+
+    def _redshift_slider_moved(self, value):
+        zmin, zmax = self._redshift_range()
+        redshift = zmin + (zmax - zmin) * value / REDSHIFT_SLIDER_STEPS
+
+        self.button_pane.redshift_textbox.setText('{:g}'.format(redshift))
+        self._apply_redshift()
+
+    def _redshift_text_changed(self, *args):
+        self._sync_redshift_slider()
+        self._apply_redshift()
+
+    # moves the lines plotted from this pane, if any, to the
+    # current redshift.
+    def _apply_redshift(self):
+        textbox = self.button_pane.redshift_textbox
+        if not textbox.hasAcceptableInput():
+            return
+
+        plotter = getattr(self._caller.plot_window, 'line_labels_plotter', None)
+        if plotter is None:
+            return
+
+        plotter.set_redshift(self, float(textbox.text()),
+                             self.button_pane.combo_box_z_units.currentText())
+
     def handle_button_activation(self):
         nselected = len(self.table_view.selectionModel().selectedRows())
         self.button_pane.create_set_button.setEnabled(nselected > 0)
@@ -548,7 +675,9 @@ class PlottedLinesPane(QWidget):
         layout.setSizeConstraint(QLayout.SetMaximumSize)
         self.setLayout(layout)
 
-        table_model = LineListTableModel(plotted_lines)
+        table_model = LineListTableModel(plotted_lines, plotting_columns=True)
+        self.table_model = table_model
+
         if table_model.rowCount() > 0:
             table_view = QTableView()
 
@@ -574,71 +703,131 @@ class PlottedLinesPane(QWidget):
 
 class LineListTableModel(QAbstractTableModel):
 
-    def __init__(self, linelist, parent=None, *args):
+    # The model is backed by the columns of the line list. Cells are
+    # only formatted when the view asks for them, that is, for the
+    # rows actually displayed, and the most recently formatted cells
+    # are cached. Building the model is thus nearly free, even for
+    # the largest line lists.
+    #
+    # The model of the plotted lines (a merged list) is built with
+    # `plotting_columns` set, to also show the redshifted wavelength,
+    # color and height each line is plotted with.
+
+    def __init__(self, linelist, parent=None, *args, plotting_columns=False):
 
         QAbstractTableModel.__init__(self, parent, *args)
 
         self._linelist = linelist
 
-        #TODO move entire table contents to an array of QVector
-        # instances that will store the columns. This should
-        # speed up the sorting (as far as some indications in
-        # the net suggest:
-        # http://www.qtforum.org/article/30638/qsortfilterproxymodel-qtreeview-sort-performance.html).
-        # Bummer... this is C++ only; PyQt never went to the trouble
-        # of converting QVector to python.
-        #
-        # get rid entirely of astropy table and store its contents in
-        # a 2-D list of lists. By using python lists instead of an
-        # astropy table, and storing the QVariant instances instead
-        # of the raw content, we can speed up sorting by a factor > 10X.
+        self._colnames = list(linelist.colnames)
+        self._columns = []
+        self._masks = []
+        for colname in linelist.colnames:
+            column = linelist[colname]
+            self._columns.append(np.asarray(column))
+
+            mask = None
+            if np.ma.is_masked(column):
+                mask = np.ma.getmaskarray(column)
+            self._masks.append(mask)
+
+        # The plotting columns are taken from the lists the lines were
+        # merged from, so they are computed here instead of being stored
+        # in the merged table.
+        if plotting_columns:
+            self._add_plotting_columns(linelist)
 
         # we have to do this here because some lists may
         # have no lines at all.
-        self._nrows = 0
-        self._ncols = 0
-
-        self._row_cells = []
-
-        for row in self._linelist:
-            cells = []
-            for rindex in range(len(row)):
-                cell = row[rindex]
-
-                # handling of a color object can be tricky. Color names
-                # returned by QColor.colorNames() are inconsistent with
-                # color names in Qt.GlobalColor. We just go to the basics
-                # and compare color equality (or closeness) using a distance
-                # criterion in r,g,b coordinates.
-                # Although costly, this would be a CPU burden only when
-                # sorting columns with color information. For now, only
-                # the Plotted Lines line list has such information, and
-                # the number of actually plotted lines tends to be small
-                # anyway.
-                if isinstance(cell, QColor):
-                    r = cell.red()
-                    g = cell.green()
-                    b = cell.blue()
-                    min_dist = 100000
-                    result = cell
-                    for color_name, orig_color in ID_COLORS.items():
-                        orig_rgb = QColor(orig_color)
-                        dist = abs(orig_rgb.red() - r) + abs(orig_rgb.green() - g) + abs(orig_rgb.blue() - b)
-                        if dist < min_dist:
-                            min_dist = dist
-                            result = orig_color
-
-                    key = [k for k,value in ID_COLORS.items() if value == result][0]
-
-                    cells.append(QVariant(key))
-
-                else:
-                    cells.append(QVariant(str(cell)))
+        self._nrows = len(linelist)
+        self._ncols = len(self._colnames) if self._nrows > 0 else 0
+
+        self._cell_cache = OrderedDict()
+        self._sort_keys = {}
+
+    def update_plotting_columns(self):
+        """
+        Computes the plotting columns again from the current redshift,
+        color and height of the lists the lines were merged from, and
+        discards the cells formatted from the previous values.
+        """
+        first = len(self._linelist.colnames)
+        if len(self._colnames) == first:
+            return
+
+        del self._colnames[first:]
+        del self._columns[first:]
+        del self._masks[first:]
+        self._add_plotting_columns(self._linelist)
+
+        self._cell_cache = OrderedDict((key, value) for key, value
+                                       in self._cell_cache.items()
+                                       if key[1] < first)
+        for column in range(first, len(self._colnames)):
+            self._sort_keys.pop(column, None)
+
+        if self._nrows > 0:
+            self.dataChanged.emit(self.index(0, first),
+                                  self.index(self._nrows - 1, self._ncols - 1))
+
+    def _add_plotting_columns(self, linelist):
+        source_lists = linelist.source_lists
+        source_index = linelist.source_index
+
+        colors = np.empty(len(source_lists), dtype=object)
+        colors[:] = [x.color for x in source_lists]
+        heights = np.array([x.height for x in source_lists], dtype=float)
+
+        columns = [(REDSHIFTED_WAVELENGTH_COLUMN, linelist.redshifted_wavelengths()),
+                   (COLOR_COLUMN, colors[source_index]),
+                   (HEIGHT_COLUMN, heights[source_index])]
+
+        for colname, values in columns:
+            self._colnames.append(colname)
+            self._columns.append(values)
+            self._masks.append(None)
+
+    def _format_cell(self, row, column):
+        mask = self._masks[column]
+        if mask is not None and mask[row]:
+            return str(np.ma.masked)
+
+        cell = self._columns[column][row]
+
+        # handling of a color object can be tricky. Color names
+        # returned by QColor.colorNames() are inconsistent with
+        # color names in Qt.GlobalColor.
+        if isinstance(cell, QColor):
+            return _color_name(cell)
+
+        return str(cell)
+
+    def sort_keys(self, column):
+        # Returns the values used to sort a column: floats when all the
+        # (unmasked) cells of the column are numbers, strings otherwise.
+        # Masked cells sort as NaN, which goes last, or as empty strings.
+        keys = self._sort_keys.get(column)
+
+        if keys is None:
+            values = self._columns[column]
+            mask = self._masks[column]
+
+            if values.dtype.kind == 'O':
+                keys = np.array([self._format_cell(row, column)
+                                 for row in range(self._nrows)])
+            else:
+                valid = slice(None) if mask is None else ~mask
+                try:
+                    keys = np.full(self._nrows, np.nan)
+                    keys[valid] = values[valid].astype(float)
+                except (TypeError, ValueError):
+                    keys = values.astype(str)
+                    if mask is not None:
+                        keys[mask] = ''
 
-            self._row_cells.append(cells)
+            self._sort_keys[column] = keys
 
-            self._nrows = len(self._row_cells)
-            self._ncols = len(self._row_cells[0])
+        return keys
 
     def rowCount(self, parent=None, *args, **kwargs):
         # this has to use a pre-computed number of rows,
@@ -653,26 +842,35 @@ class LineListTableModel(QAbstractTableModel):
         if role != Qt.DisplayRole:
             return QVariant()
 
-        # This is the main bottleneck for sorting. Profiling experiments
-        # show that the main culprit is the .columns[][] accessor in the
-        # astropy table. The index.column() and index.row() calls cause
-        # negligible CPU load.
-        #
-        # return self._linelist.columns[index.column()][index.row()]
-        #
-        # going from an astropy table to a list of rows, the bottleneck
-        # narrows down to the astropy code that gets a cell value from a
-        # Row instance.
-        return self._row_cells[index.row()][index.column()]
+        # Cells are read from plain numpy arrays, since the .columns[][]
+        # accessor in the astropy table is slow.
+        key = (index.row(), index.column())
+
+        value = self._cell_cache.get(key)
+        if value is None:
+            value = QVariant(self._format_cell(*key))
+
+            self._cell_cache[key] = value
+            if len(self._cell_cache) > CELL_CACHE_SIZE:
+                self._cell_cache.popitem(last=False)
+        else:
+            self._cell_cache.move_to_end(key)
+
+        return value
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole and orientation == Qt.Horizontal:
-            return self._linelist.colnames[section]
+            return self._colnames[section]
 
         # This generates tooltips for header cells
         if role == Qt.ToolTipRole and orientation == Qt.Horizontal:
-            if self._linelist.colnames[section] in [WAVELENGTH_COLUMN, ERROR_COLUMN]:
+            colname = self._colnames[section]
+            if colname in [WAVELENGTH_COLUMN, ERROR_COLUMN]:
                 result = self._linelist.columns[section].unit
+            elif colname == REDSHIFTED_WAVELENGTH_COLUMN:
+                result = self._linelist[WAVELENGTH_COLUMN].unit
+            elif section >= len(self._linelist.colnames):
+                result = ''
             else:
                 # this captures glitches that generate None tooltips
                 if self._linelist.tooltips:
@@ -687,30 +885,117 @@ class LineListTableModel(QAbstractTableModel):
         return self._linelist.name
 
 
-class SortModel(QSortFilterProxyModel):
+class SortModel(QAbstractProxyModel):
+
+    # Sorting proxy for LineListTableModel instances. Instead of comparing
+    # cells pair by pair, which means parsing strings for every comparison,
+    # the whole column is sorted at once with numpy, using the typed sort
+    # keys provided by the table model. The proxy then just maps rows
+    # through the resulting permutation.
 
     def __init__(self, name):
         super(SortModel, self).__init__()
 
         self._name = name
 
-    def lessThan(self, left, right):
-        left_data = left.data()
-        right_data = right.data()
+        # proxy row -> source row, and source row -> proxy row.
+        # None means the rows are in their original order.
+        self._order = None
+        self._rank = None
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super(SortModel, self).setSourceModel(model)
+        self._order = None
+        self._rank = None
+        self.endResetModel()
+
+        model.dataChanged.connect(self._on_source_data_changed)
+
+    def _on_source_data_changed(self, top_left, bottom_right, *args):
+        # Sorted rows are scattered, so the whole height of the changed
+        # columns is reported as changed.
+        if self.rowCount() > 0:
+            self.dataChanged.emit(
+                self.index(0, top_left.column()),
+                self.index(self.rowCount() - 1, bottom_right.column()))
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        # parent() with no arguments is the QObject method.
+        if index is None:
+            return super(SortModel, self).parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount()
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+
+        row = proxy_index.row()
+        if self._order is not None:
+            row = int(self._order[row])
+
+        return self.sourceModel().index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+
+        row = source_index.row()
+        if self._rank is not None:
+            row = int(self._rank[row])
+
+        return self.index(row, source_index.column())
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        source_model = self.sourceModel()
+        if source_model is None:
+            return
+
+        self.layoutAboutToBeChanged.emit()
+
+        persistent = self.persistentIndexList()
+        source_indices = [self.mapToSource(index) for index in persistent]
+
+        # a negative column restores the original order.
+        if column < 0 or source_model.rowCount() == 0:
+            self._order = None
+            self._rank = None
+        else:
+            keys = source_model.sort_keys(column)
+
+            # NaN values go last in both orders.
+            if order == Qt.DescendingOrder and keys.dtype.kind == 'f':
+                permutation = np.argsort(-keys, kind='mergesort')
+            else:
+                permutation = np.argsort(keys, kind='mergesort')
+                if order == Qt.DescendingOrder:
+                    permutation = permutation[::-1]
+
+            rank = np.empty_like(permutation)
+            rank[permutation] = np.arange(len(permutation))
 
-        # it's enough to find type using just one of the parameters,
-        # since they both necessarily come from the same table column.
-        try:
-            l = float(left_data)
-            r = float(right_data)
-            return l < r
-        except:
-            # Lexicographic string comparison. The parameters passed
-            # to this method from a sortable table model are stored
-            # in QtCore.QModelIndex instances.
-            return str(left_data) < str(right_data)
+            self._order = permutation
+            self._rank = rank
 
-    def getName(self):
-        return self._name
+        self.changePersistentIndexList(
+            persistent, [self.mapFromSource(index) for index in source_indices])
 
+        self.layoutChanged.emit()
 
+    def getName(self):
+        return self._name
@@ -6,7 +6,7 @@ import astropy.units as u
 import numpy as np
 import pyqtgraph as pg
 import qtawesome as qta
-from qtpy.QtCore import Signal, QEvent
+from qtpy.QtCore import Qt, Signal
 from qtpy.QtWidgets import (QColorDialog, QMainWindow, QMdiSubWindow,
                             QMessageBox, QErrorMessage, QWidget)
 from qtpy.uic import loadUi
@@ -147,7 +147,6 @@ class PlotWidget(pg.PlotWidget):
     roi_moved = Signal(u.Quantity)
     roi_removed = Signal(LinearRegionItem)
 
-    mouse_enterexit = Signal(QEvent.Type)
     dismiss_linelists_window = Signal(bool)
     erase_linelabels = Signal(pg.PlotWidget)
 
@@ -195,7 +194,7 @@ class PlotWidget(pg.PlotWidget):
         # Listen for model events to add/remove items from the plot
         self.proxy_model.rowsInserted.connect(self._check_unit_compatibility)
         self.proxy_model.rowsAboutToBeRemoved.connect(
-            lambda idx: self.remove_plot(index=idx))
+            self._on_rows_about_to_be_removed)
 
         self.plot_added.connect(self.check_plot_compatibility)
         self.plot_removed.connect(self.check_plot_compatibility)
@@ -322,25 +321,59 @@ class PlotWidget(pg.PlotWidget):
             if not proxy_index.isValid():
                 continue
 
-            plot_data_item = self.proxy_model.item_from_index(proxy_index)
-
             if self.data_unit is None and self.spectral_axis_unit is None or \
-                    plot_data_item.are_units_compatible(
+                    model_item.are_units_compatible(
                         self.spectral_axis_unit, self.data_unit):
-                plot_data_item.data_item.setEnabled(True)
+                model_item.setEnabled(True)
             else:
+                plot_data_item = self.proxy_model.item_from_index(proxy_index)
                 plot_data_item.visible = False
-                plot_data_item.data_item.setEnabled(False)
+                model_item.setEnabled(False)
 
-    def _check_unit_compatibility(self, index, first=None, last=None):
-        if not index.isValid():
+    def _check_unit_compatibility(self, parent, first, last):
+        """
+        Disables newly inserted data items whose units are incompatible with
+        this plot. All the rows of a batch insertion are handled in one pass.
+        """
+        if parent.isValid() or (self.data_unit is None and
+                                self.spectral_axis_unit is None):
             return
 
-        plot_data_item = self.proxy_model.item_from_index(index)
+        source_model = self.proxy_model.sourceModel()
+
+        for row in range(first, last + 1):
+            index = self.proxy_model.mapToSource(
+                self.proxy_model.index(row, 0, parent))
+            data_item = source_model.data(index, role=Qt.UserRole)
 
-        if not plot_data_item.are_units_compatible(self.spectral_axis_unit,
-                                                   self.data_unit):
-            plot_data_item.setEnabled(False)
+            if not data_item.are_units_compatible(
+                    self.spectral_axis_unit, self.data_unit):
+                data_item.setEnabled(False)
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        """
+        Removes the plots of data items that are about to be removed from
+        the model, and releases their plot data items.
+        """
+        if parent.isValid():
+            return
+
+        source_model = self.proxy_model.sourceModel()
+        indices = [self.proxy_model.index(row, 0, parent)
+                   for row in range(first, last + 1)]
+        identifiers = {source_model.data(self.proxy_model.mapToSource(index),
+                                         role=Qt.UserRole).identifier
+                       for index in indices}
+
+        for plot_data_item in self.listDataItems():
+            if isinstance(plot_data_item, PlotDataItem) and \
+                    plot_data_item.data_item.identifier in identifiers:
+                self.remove_plot(item=plot_data_item)
+
+        # Removing plots re-evaluates the compatibility of every row, which
+        # creates plot data items again, so they are only released here.
+        for index in indices:
+            self.proxy_model.take_item(index)
 
     def add_plot(self, item=None, index=None, visible=True, initialize=False):
         """
@@ -560,12 +593,6 @@ class PlotWidget(pg.PlotWidget):
     # at hand. The range will be used to bracket the set of lines
     # actually read from the line list table(s).
 
-    def enterEvent(self, event):
-        self.mouse_enterexit.emit(event.type())
-
-    def leaveEvent(self, event):
-        self.mouse_enterexit.emit(event.type())
-
     def _find_wavelength_range(self):
         # increasing dispersion values!
         amin = sys.float_info.max
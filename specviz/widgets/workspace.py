@@ -6,11 +6,13 @@ from astropy.io import registry as io_registry
 from qtpy import compat
 from qtpy.QtCore import QEvent, Qt, Signal
 from qtpy.QtWidgets import (QApplication, QMainWindow, QMenu,
-                            QMessageBox, QTabBar, QToolButton)
+                            QMessageBox, QProgressBar, QPushButton, QTabBar,
+                            QToolButton)
 from qtpy.uic import loadUi
 from specutils import Spectrum1D
 
 from .plotting import PlotWindow
+from ..core.data_loader import DataLoader, expand_file_paths
 from ..core.items import PlotDataItem
 from ..core.models import DataListModel
 from ..core.plugin import plugin
@@ -59,6 +61,8 @@ class Workspace(QMainWindow):
         # Setup data action connections
         self.load_data_action.triggered.connect(
             self._on_load_data)
+        self.load_directory_action.triggered.connect(
+            self._on_load_directory)
         self.delete_data_action.triggered.connect(
             self._on_delete_data)
 
@@ -97,6 +101,26 @@ class Workspace(QMainWindow):
         # When a new data item is added to the model, select that item
         # self._model.rowsInserted.connect(self._on_row_inserted)
 
+        # Read data files in the background so that the ui stays responsive
+        self._data_loader = DataLoader(parent=self)
+        self._load_failures = []
+        self._data_loader.loaded.connect(self._on_data_loaded)
+        self._data_loader.batch_loaded.connect(self._on_data_batch_loaded)
+        self._data_loader.failed.connect(self._on_data_load_failed)
+        self._data_loader.progress.connect(self._on_data_load_progress)
+        self._data_loader.finished.connect(self._on_data_load_finished)
+
+        # Loading progress is displayed in the status bar, along with a button
+        # allowing the user to cancel the remaining loads
+        self._load_progress_bar = QProgressBar()
+        self._load_progress_bar.setMaximumWidth(200)
+        self._load_cancel_button = QPushButton("Cancel")
+        self._load_cancel_button.clicked.connect(self._data_loader.cancel)
+
+        self.statusBar().addPermanentWidget(self._load_progress_bar)
+        self.statusBar().addPermanentWidget(self._load_cancel_button)
+        self._on_data_load_finished()
+
         # Mount plugins
         plugin.mount(self)
 
@@ -114,6 +138,14 @@ class Workspace(QMainWindow):
         """
         return self._model
 
+    @property
+    def data_loader(self):
+        """
+        The :class:`~specviz.core.data_loader.DataLoader` reading data files
+        in the background for this workspace.
+        """
+        return self._data_loader
+
     @property
     def proxy_model(self):
         if self.current_plot_window is not None:
@@ -243,6 +275,12 @@ class Workspace(QMainWindow):
 
         return super().event(e)
 
+    def closeEvent(self, e):
+        """Stops loading data files when the workspace is closed."""
+        self.data_loader.shutdown()
+
+        super().closeEvent(e)
+
     def add_plot_window(self):
         """
         Creates a new plot widget sub window and adds it to the workspace.
@@ -326,15 +364,118 @@ class Workspace(QMainWindow):
                    for x in io_registry.get_formats(Spectrum1D)
                    if x['Read'] == 'Yes']
 
-        file_path, fmt = compat.getopenfilename(parent=self,
-                                                caption="Load spectral data file",
-                                                filters=";;".join(filters),
-                                                selectedfilter=default_filter)
+        file_paths, fmt = compat.getopenfilenames(parent=self,
+                                                  caption="Load spectral data files",
+                                                  filters=";;".join(filters),
+                                                  selectedfilter=default_filter)
+
+        if not file_paths:
+            return
+
+        self.load_data_async(file_paths,
+                             file_loader=" ".join(fmt.split()[:-1]),
+                             batch=len(file_paths) > 1)
+
+    def _on_load_directory(self):
+        """
+        Provides a directory selection dialog and loads every file in the
+        selected directory, letting the io registry identify each file's
+        format. Files no reader recognises are reported with the other load
+        failures.
+        """
+        directory = compat.getexistingdirectory(
+            parent=self, caption="Load spectral data directory")
+
+        if not directory:
+            return
+
+        self.load_data_async(expand_file_paths([directory]),
+                             file_loader=None, batch=True)
+
+    def load_data_async(self, file_paths, file_loader, batch=False):
+        """
+        Load spectral data files in the background.
+
+        Parameters
+        ----------
+        file_paths : list of str
+            Paths to location of the spectrum files.
+        file_loader : str
+            Format specified for the astropy io interface.
+        batch : bool
+            If `False`, files are read concurrently, and each resulting data
+            item is added to the model and displayed in the current plot as
+            soon as its file has been read. If `True`, files are parsed in
+            parallel across all cores and the resulting data items are added
+            to the model together once every file has been read, without
+            being displayed.
+        """
+        self.data_loader.load(file_paths, file_loader, batch=batch)
+
+    @staticmethod
+    def _data_name(file_path):
+        return file_path.split('/')[-1].split('.')[0]
+
+    def _on_data_loaded(self, spec, file_path):
+        data_item = self.model.add_data(spec, name=self._data_name(file_path))
+
+        self._display_data_item(data_item)
+
+    def _on_data_batch_loaded(self, specs, file_paths):
+        self.model.add_data_many(specs, [self._data_name(x)
+                                         for x in file_paths])
+
+    def _on_data_load_failed(self, file_path, message):
+        # Failures are reported together once loading is over, so that a
+        # batch does not open one dialog per file.
+        self._load_failures.append((file_path, message))
+
+    def _report_load_failures(self):
+        failures, self._load_failures = self._load_failures, []
+
+        if len(failures) == 0:
+            return
 
-        if not file_path:
+        message_box = QMessageBox()
+        message_box.setIcon(QMessageBox.Critical)
+
+        if len(failures) == 1:
+            message_box.setText("Error loading data set.")
+            message_box.setInformativeText("{}\n{}".format(*failures[0]))
+        else:
+            message_box.setText(
+                "Error loading {} data sets.".format(len(failures)))
+            message_box.setInformativeText(
+                "\n".join(file_path for file_path, _ in failures[:10]) +
+                ("\n..." if len(failures) > 10 else ""))
+            message_box.setDetailedText(
+                "\n\n".join("{}\n{}".format(*x) for x in failures))
+
+        message_box.exec()
+
+    def _on_data_load_progress(self, completed, total):
+        self._load_progress_bar.setMaximum(total)
+        self._load_progress_bar.setValue(completed)
+        self._load_progress_bar.show()
+        self._load_cancel_button.show()
+
+    def _on_data_load_finished(self):
+        self._load_progress_bar.hide()
+        self._load_cancel_button.hide()
+
+        self._report_load_failures()
+
+    def _display_data_item(self, data_item):
+        """
+        Attempts to add the data item to the current plot.
+        """
+        if self.current_plot_window is None:
             return
 
-        self.load_data(file_path, file_loader=" ".join(fmt.split()[:-1]))
+        plot_data_item = self.proxy_model.item_from_id(data_item.identifier)
+        plot_data_item.visible = True
+        self.current_plot_window.plot_widget.on_item_changed(data_item)
+        self._on_item_changed(item=plot_data_item.data_item)
 
     def load_data(self, file_path, file_loader, display=False):
         """
@@ -356,15 +497,12 @@ class Workspace(QMainWindow):
         """
         try:
             spec = Spectrum1D.read(file_path, format=file_loader)
-            name = file_path.split('/')[-1].split('.')[0]
-            data_item = self.model.add_data(spec, name=name)
+            data_item = self.model.add_data(spec,
+                                            name=self._data_name(file_path))
 
             # If there are any current plots, attempt to add the data to the
             # plot
-            plot_data_item = self.proxy_model.item_from_id(data_item.identifier)
-            plot_data_item.visible = True
-            self.current_plot_window.plot_widget.on_item_changed(data_item)
-            self._on_item_changed(item=plot_data_item.data_item)
+            self._display_data_item(data_item)
 
             return data_item
         except: